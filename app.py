@@ -1,9 +1,4 @@
 import streamlit as st
-import subprocess
-import sys
-import os
-import time
-import threading
 from pathlib import Path
 
 # Import frontend modules
@@ -13,31 +8,10 @@ from frontend.lead_management import show_lead_management
 from frontend.team_progress import show_team_progress
 from frontend.team_management import show_team_management
 from frontend.reports import show_reports
-from frontend.helpers import check_authentication, require_roles, get_role_display_name, get_user_role
-
-def initialize_database():
-    """Initialize the database with required tables"""
-    try:
-        from backend.db import init_db
-        init_db()
-        print("Database initialized successfully!")
-    except Exception as e:
-        print(f"Database initialization failed: {e}")
-
-def start_backend_server():
-    """Start the Flask backend server"""
-    try:
-        # Start the backend server
-        backend_process = subprocess.Popen([
-            sys.executable, "run_backend.py"
-        ], cwd=os.getcwd())
-        
-        # Wait a moment for the server to start
-        time.sleep(3)
-        return backend_process
-    except Exception as e:
-        st.error(f"Failed to start backend server: {e}")
-        return None
+from frontend.helpers import (
+    check_authentication, require_roles, get_role_display_name, get_user_role, show_api_latency_panel
+)
+from frontend.backend_server import get_backend_supervisor
 
 def main():
     """Main application entry point"""
@@ -48,11 +22,6 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Initialize database on first run
-    if 'db_initialized' not in st.session_state:
-        initialize_database()
-        st.session_state.db_initialized = True
-    
     # Custom CSS for better styling
     st.markdown("""
     <style>
@@ -91,9 +60,15 @@ def main():
     if 'current_page' not in st.session_state:
         st.session_state.current_page = 'dashboard'
     
-    # Start backend server if not already running
-    if 'backend_process' not in st.session_state:
-        st.session_state.backend_process = start_backend_server()
+    # Use the host's backend, starting it once if nothing is serving yet
+    try:
+        backend_ready = get_backend_supervisor().ensure_running()
+    except Exception as e:
+        backend_ready = False
+        print(f"Failed to start backend server: {e}")
+    if not backend_ready:
+        st.error("Backend server is not available. Please check the backend logs and refresh.")
+        st.stop()
     
     # Main header
     st.markdown("""
@@ -144,6 +119,10 @@ def main():
             
             st.markdown("---")
             
+            # Backend latency per endpoint - Admin only
+            if user_role == 'admin' and st.checkbox("Show API latency", key='show_api_latency'):
+                show_api_latency_panel()
+            
             # Logout button
             if st.button("🚪 Logout", use_container_width=True):
                 st.session_state.clear()
@@ -2,11 +2,16 @@ from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
-from backend.db import init_db
+from backend.db import init_db, init_app as init_db_app
 from backend.routes import app as routes_app
 
-def create_app():
-    """Create and configure Flask application"""
+def create_app(init_database=True):
+    """Create and configure Flask application
+
+    init_db is version-checked and costs a single read once the schema is
+    current, so every process serving the app runs it. Pass
+    init_database=False only when the caller manages the schema itself.
+    """
     app = Flask(__name__)
     app.config.from_object(Config)
     
@@ -15,7 +20,9 @@ def create_app():
     jwt = JWTManager(app)
     
     # Initialize database
-    init_db()
+    if init_database:
+        init_db()
+    init_db_app(app)
     
     # Register routes
     app.register_blueprint(routes_app)
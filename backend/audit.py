@@ -0,0 +1,205 @@
+"""Write-behind pipeline for login audit events.
+
+Logins append an event to an in-memory queue and return. A background
+writer drains the queue and writes login_logs rows, users.last_login and
+resolved login locations in one transaction per batch, flushing when
+AUDIT_BATCH_SIZE events are waiting or every AUDIT_FLUSH_INTERVAL seconds.
+A batch that finds the database locked (e.g. by an MIS load) stays pending
+and is retried with backoff; only permanent errors drop events. Pending
+events are flushed when the process exits normally.
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from config import Config
+from backend.db import write_audit_batch
+
+_STOP = object()
+
+
+def utc_timestamp():
+    """Current UTC time in SQLite's CURRENT_TIMESTAMP format"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def is_transient_error(error):
+    """Check if a SQLite error means the database was locked or busy, not that the write is invalid"""
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class AuditWriter:
+    """Batches login and location events into few SQLite transactions"""
+
+    def __init__(self, batch_size=500, flush_interval=1.0, queue_size=10000,
+                 retry_limit=10, retry_delay=0.1, retry_max_delay=5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_limit = retry_limit
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._metrics = {
+            'events': 0, 'batches': 0, 'written': 0, 'direct': 0, 'retries': 0, 'errors': 0, 'dropped': 0
+        }
+
+    def record_login(self, user_id, ip_address, location, user_agent):
+        """Queue a login: a login_logs row plus the user's last_login/login_location"""
+        self._put(('login', (user_id, utc_timestamp(), ip_address, location, user_agent)))
+
+    def record_location(self, user_id, ip_address, location):
+        """Queue a resolved location for a user's pending logins from an IP"""
+        self._put(('location', (user_id, ip_address, location)))
+
+    def _put(self, event):
+        """Queue an event, writing it directly if the writer is closed or full"""
+        with self._lock:
+            self._metrics['events'] += 1
+        if not self._closed:
+            self._ensure_started()
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                pass
+        with self._lock:
+            self._metrics['direct'] += 1
+        self._write([event])
+
+    def _ensure_started(self):
+        """Start the writer thread on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        """Collect events into batches and write them until stopped"""
+        while True:
+            batch = []
+            stop = False
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    event = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if event is _STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(event)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, events):
+        """Write a batch of events in one transaction, retrying while the database is locked.
+
+        The batch's events stay unacknowledged on the queue until this
+        returns, so flush() keeps waiting for them. Events are dropped only
+        on a permanent error or once retry_limit retries are exhausted.
+        """
+        logins = [values for kind, values in events if kind == 'login']
+        locations = [values for kind, values in events if kind == 'location']
+        delay = self.retry_delay
+        for attempt in range(self.retry_limit + 1):
+            try:
+                write_audit_batch(logins, locations)
+            except sqlite3.OperationalError as e:
+                if not is_transient_error(e) or attempt == self.retry_limit:
+                    self._drop(events, e)
+                    return
+                print(f"Audit batch of {len(events)} events hit a busy database, retrying in {delay:.2f}s: {e}")
+                with self._lock:
+                    self._metrics['retries'] += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self.retry_max_delay)
+                continue
+            except Exception as e:
+                self._drop(events, e)
+                return
+            with self._lock:
+                self._metrics['batches'] += 1
+                self._metrics['written'] += len(events)
+            return
+
+    def _drop(self, events, error):
+        """Give up on a batch that could not be written"""
+        print(f"Dropped audit batch of {len(events)} events: {error}")
+        with self._lock:
+            self._metrics['errors'] += 1
+            self._metrics['dropped'] += len(events)
+
+    def flush(self):
+        """Block until every queued event has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Write pending events and stop the writer; later events are written directly"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        # Anything queued after the stop marker
+        leftover = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not _STOP:
+                leftover.append(event)
+        if leftover:
+            self._write(leftover)
+
+    def stats(self):
+        """Return writer metrics"""
+        with self._lock:
+            stats = dict(self._metrics)
+        stats['pending'] = self._queue.qsize()
+        return stats
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """Return the process-wide audit writer, creating it on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    batch_size=Config.AUDIT_BATCH_SIZE,
+                    flush_interval=Config.AUDIT_FLUSH_INTERVAL,
+                    queue_size=Config.AUDIT_QUEUE_SIZE,
+                    retry_limit=Config.AUDIT_RETRY_LIMIT,
+                    retry_delay=Config.AUDIT_RETRY_DELAY,
+                    retry_max_delay=Config.AUDIT_RETRY_MAX_DELAY
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+
+def close_audit_writer():
+    """Flush and stop the process-wide audit writer if one was started"""
+    if _writer is not None:
+        _writer.close()
@@ -1,19 +1,32 @@
-import bcrypt
 import jwt
 from datetime import datetime, timedelta
 from flask import request, jsonify, g
 from functools import wraps
 import json
-from backend.db import get_db_connection
+from backend.db import get_db_connection, get_active_user, update_password_hash
+from backend import passwords
 from config import Config
 
 def hash_password(password):
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    """Hash password at the configured bcrypt cost"""
+    return passwords.hash_password(password)
 
 def check_password(stored_hash, password):
-    """Verify password against stored hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+    """Verify password against a bcrypt or werkzeug hash"""
+    return passwords.check_password(stored_hash, password)
+
+def verify_login(user, password):
+    """Verify a login password on the hashing pool, upgrading an outdated hash.
+
+    Raises backend.passwords.HashingBusy when the pool is saturated.
+    """
+    ok, new_hash = passwords.verify_and_upgrade(user['id'], user['password_hash'], password)
+    if ok and new_hash:
+        try:
+            update_password_hash(user['id'], new_hash)
+        except Exception as e:
+            print(f"Password rehash error (non-critical): {e}")
+    return ok
 
 def create_token(user_id, username, role):
     """Create JWT token with user information"""
@@ -59,7 +72,7 @@ def authenticate_user(username, password):
         """, (username,))
         
         user = cursor.fetchone()
-        if user and check_password(user['password_hash'], password):
+        if user and verify_login(user, password):
             return dict(user)
         return None
         
@@ -108,17 +121,8 @@ def require_auth(f):
         if not payload:
             return jsonify({"message": "Invalid or expired token"}), 401
         
-        # Get user details from database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, username, email, role, team_leader_id, is_active
-            FROM users 
-            WHERE id = ? AND is_active = 1
-        """, (payload['user_id'],))
-        
-        user = cursor.fetchone()
-        conn.close()
+        # Get user details (cached; see get_active_user)
+        user = get_active_user(payload['user_id'])
         
         if not user:
             return jsonify({"message": "User not found or inactive"}), 401
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds.
+
+    The cache is per process; with several workers each keeps its own copy,
+    so ttl bounds how stale an entry can get after a change made elsewhere.
+    """
+
+    def __init__(self, max_size=1024, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key, default=None):
+        """Return a live entry, refreshing its LRU position"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._metrics['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._metrics['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Store an entry, evicting the least recently used ones over max_size"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._metrics['evictions'] += 1
+
+    def invalidate(self, key):
+        """Drop one entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return cache metrics"""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats.update({'size': len(self._entries), 'max_size': self.max_size, 'ttl': self.ttl})
+        return stats
@@ -0,0 +1,92 @@
+"""Composite dashboard: every requested panel in one round trip.
+
+The panels are the same queries the individual /progress, /team and
+/mis-data/aggregate endpoints run. Serving them from one request
+authenticates once, resolves the caller's role scope once and runs every
+query on the request's pooled connection.
+"""
+import time
+from backend.db import get_all_users, get_team_members
+from backend.mis import aggregate_mis_data
+from backend.progress import (
+    get_progress_statistics, get_mis_analytics, get_lead_analytics_by_status,
+    get_user_login_stats, get_user_performance, get_team_member_detailed_stats
+)
+
+
+class UnknownPanel(ValueError):
+    """Raised when a dashboard request names a panel that doesn't exist"""
+
+
+class PanelDenied(Exception):
+    """Raised when the caller's role may not see a panel"""
+
+
+def _team_members(scope, days, options):
+    """Users visible to an admin (everyone) or a team leader (their team)"""
+    user_id, role, _ = scope
+    users = get_all_users() if role == 'admin' else get_team_members(user_id)
+    return [{
+        'id': user['id'],
+        'username': user['username'],
+        'email': user['email'],
+        'role': user['role'],
+        'created_at': user['created_at'],
+        'is_active': user['is_active']
+    } for user in users]
+
+
+def _mis_counts(scope, days, options):
+    """MIS record counts per requested column, {column: [{column, count}]}"""
+    return {
+        column: aggregate_mis_data(*scope, group_by=[column], top=top)
+        for column, top in options.get('mis_counts', {}).items()
+    }
+
+
+# name -> (loader(scope, days, options), roles allowed or None for everyone)
+PANELS = {
+    'stats': (lambda scope, days, options: get_progress_statistics(*scope, days), None),
+    'mis-analytics': (lambda scope, days, options: get_mis_analytics(*scope, days), None),
+    'lead-analytics': (lambda scope, days, options: get_lead_analytics_by_status(*scope, days), None),
+    'login-stats': (lambda scope, days, options: get_user_login_stats(*scope, days), None),
+    'performance': (lambda scope, days, options: get_user_performance(*scope, days), None),
+    'team-detailed': (
+        lambda scope, days, options: get_team_member_detailed_stats(scope[0], days), ('team_leader',)
+    ),
+    'team-members': (_team_members, ('admin', 'team_leader')),
+    'mis-counts': (_mis_counts, None),
+}
+
+
+def load_dashboard(user, panels, days=30, options=None):
+    """Build the requested panels for one user.
+
+    options carries panel arguments, e.g. {'mis_counts': {column: top}}.
+    A panel that fails or is not allowed for the user's role is reported
+    under errors; the other panels are still returned. Returns a dict with
+    panels, errors and timings_ms (per panel and total).
+    """
+    unknown = [name for name in panels if name not in PANELS]
+    if unknown:
+        raise UnknownPanel(f"Unknown panels: {', '.join(unknown)}")
+
+    scope = (user['id'], user['role'], user['team_leader_id'])
+    options = options or {}
+    result = {'panels': {}, 'errors': {}, 'timings_ms': {}}
+    started = time.perf_counter()
+
+    for name in dict.fromkeys(panels):
+        loader, roles = PANELS[name]
+        panel_started = time.perf_counter()
+        try:
+            if roles is not None and user['role'] not in roles:
+                raise PanelDenied("Access denied")
+            result['panels'][name] = loader(scope, days, options)
+        except Exception as e:
+            print(f"Error loading dashboard panel {name}: {e}")
+            result['errors'][name] = str(e)
+        result['timings_ms'][name] = round((time.perf_counter() - panel_started) * 1000, 2)
+
+    result['timings_ms']['total'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
@@ -1,16 +1,143 @@
 import sqlite3
 import os
+import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from flask import g, has_app_context
 from config import Config
+from backend.pool import ConnectionPool
+from backend.cache import TTLCache
+from backend.migrations import run_migrations, schema_is_current
+from backend.rollups import apply_mis_rollup, prune_mis_rollup
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    Config.DATABASE_PATH,
+                    max_size=Config.DB_POOL_SIZE,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    pragmas=Config.SQLITE_PRAGMAS
+                )
+    return _pool
+
+def close_pool():
+    """Close the process-wide pool's connections; the next use opens a new pool.
+
+    Called before forking server workers so no SQLite handle is shared
+    across processes, and again when a worker exits.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+
+def reset_pool():
+    """Forget a pool inherited from a parent process without touching its connections"""
+    global _pool
+    with _pool_lock:
+        _pool = None
 
 def get_db_connection():
-    """Create and return a database connection"""
-    conn = sqlite3.connect('btl_tracking.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Return a pooled database connection; close() releases it to the pool.
+
+    Inside a Flask app context the connection is bound to ``g`` so every
+    helper called while serving a request shares it until teardown.
+    """
+    pool = get_pool()
+    if has_app_context() and 'db_conn' not in g:
+        g.db_conn = pool.acquire()
+    return pool.acquire()
+
+@contextmanager
+def db_connection():
+    """Context manager yielding a pooled database connection"""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def release_request_connection(exception=None):
+    """Release the request-scoped connection at app context teardown"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        conn.close()
+
+def init_app(app):
+    """Register database teardown with the Flask app"""
+    app.teardown_appcontext(release_request_connection)
+
+_table_columns = {}
+
+def get_table_columns(table):
+    """Get a table's column names in schema order, read once per process"""
+    if table not in _table_columns:
+        with db_connection() as conn:
+            rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        _table_columns[table] = [row['name'] for row in rows]
+    return _table_columns[table]
+
+def bump_table_versions(cursor, *tables):
+    """Mark tables as changed inside the caller's write transaction.
+
+    Cached analytics over these tables are recomputed on their next read,
+    in every process sharing the database.
+    """
+    cursor.execute(
+        "UPDATE table_versions SET version = version + 1 WHERE table_name IN (SELECT value FROM json_each(?))",
+        (json.dumps(tables),)
+    )
+
+def get_table_versions(tables):
+    """Get the change counters of tables as a tuple in the given order"""
+    with db_connection() as conn:
+        rows = conn.execute(
+            "SELECT table_name, version FROM table_versions WHERE table_name IN (SELECT value FROM json_each(?))",
+            (json.dumps(tables),)
+        ).fetchall()
+    versions = {row['table_name']: row['version'] for row in rows}
+    return tuple(versions.get(table, 0) for table in tables)
+
+def get_pool_stats():
+    """Get connection pool metrics and the active storage profile"""
+    pool = get_pool()
+    stats = pool.stats()
+    stats['storage_profile'] = pool.storage_profile()
+    return stats
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
 
 def init_db():
-    """Initialize the database with required tables"""
+    """Bring the database schema up to date, once per process and database.
+
+    When the recorded schema version is already current this is a single
+    read with no DDL; otherwise the base tables are created and pending
+    migrations applied.
+    """
+    database = get_pool().database
+    if database in _schema_ready:
+        return
+    with _schema_lock:
+        if database in _schema_ready:
+            return
+        with db_connection() as conn:
+            current = schema_is_current(conn)
+        if not current:
+            create_schema()
+        _schema_ready.add(database)
+
+def create_schema():
+    """Create the base tables, seed the admin user and apply pending migrations"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -159,89 +286,187 @@ def init_db():
     # Insert default admin user if not exists
     cursor.execute('SELECT * FROM users WHERE username = ?', ('admin',))
     if not cursor.fetchone():
-        from werkzeug.security import generate_password_hash
-        admin_password = generate_password_hash('admin123')
+        from backend.passwords import hash_password
+        admin_password = hash_password('admin123')
+        # OR IGNORE: workers bootstrapping a fresh database race to seed it
         cursor.execute('''
-            INSERT INTO users (username, password_hash, email, role)
+            INSERT OR IGNORE INTO users (username, password_hash, email, role)
             VALUES (?, ?, ?, ?)
         ''', ('admin', admin_password, 'admin@hsbc.com', 'admin'))
     
     conn.commit()
+    
+    # Bring the schema up to date
+    run_migrations(conn)
     conn.close()
     print("Database initialized successfully!")
 
 def get_user_by_username(username):
     """Get user by username"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
+        return cursor.fetchone()
 
 def get_user_by_id(user_id):
     """Get user by ID"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+        return cursor.fetchone()
+
+_active_users = TTLCache(max_size=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+
+def get_active_user(user_id):
+    """Get the auth details of an active user, cached per process.
+
+    Inactive or unknown users are not cached, so they are re-checked on
+    every call. update_user drops the cached entry of the user it changes.
+    Each call returns its own dict, so a caller changing g.current_user
+    can't alter the cached entry.
+    """
+    user = _active_users.get(user_id)
+    if user is not None:
+        return dict(user)
+    
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, username, email, role, team_leader_id, is_active
+            FROM users 
+            WHERE id = ? AND is_active = 1
+        ''', (user_id,))
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    user = dict(row)
+    _active_users.set(user_id, dict(user))
     return user
 
+def invalidate_user(user_id):
+    """Drop a user from the authentication cache"""
+    _active_users.invalidate(user_id)
+
+def get_user_cache_stats():
+    """Get authentication cache metrics"""
+    return _active_users.stats()
+
+# Columns update_user may change
+USER_UPDATE_COLUMNS = ('email', 'role', 'team_leader_id', 'is_active')
+
+def update_user(user_id, **changes):
+    """Update a user's email, role, team leader or active flag.
+
+    Returns False if the user does not exist or the email is taken.
+    """
+    unknown = set(changes) - set(USER_UPDATE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Cannot update user columns: {sorted(unknown)}")
+    if not changes:
+        return get_user_by_id(user_id) is not None
+    
+    assignments = ', '.join(f"{column} = ?" for column in changes)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"UPDATE users SET {assignments} WHERE id = ?",
+                list(changes.values()) + [user_id]
+            )
+            updated = cursor.rowcount > 0
+            bump_table_versions(cursor, 'users')
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return False
+        finally:
+            invalidate_user(user_id)
+        return updated
+
 def create_user(username, password_hash, email, role='user', team_leader_id=None):
     """Create a new user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT INTO users (username, password_hash, email, role, team_leader_id)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (username, password_hash, email, role, team_leader_id))
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO users (username, password_hash, email, role, team_leader_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (username, password_hash, email, role, team_leader_id))
+            user_id = cursor.lastrowid
+            
+            # Claim MIS rows loaded for this DSA before the account existed,
+            # moving their rollup contribution to the new owner
+            unclaimed = "username = UPPER(?) AND dsa_user_id IS NULL"
+            apply_mis_rollup(cursor, unclaimed, (username,), sign=-1)
+            cursor.execute(f"UPDATE mis_data SET dsa_user_id = ? WHERE {unclaimed}", (user_id, username))
+            if cursor.rowcount:
+                apply_mis_rollup(cursor, "dsa_user_id = ?", (user_id,))
+                prune_mis_rollup(cursor)
+            
+            # Likewise leads created under this username before the account existed
+            cursor.execute('''
+                UPDATE leads SET created_by_id = ?, owner_user_id = COALESCE(owner_user_id, ?)
+                WHERE created_by = ? AND created_by_id IS NULL
+            ''', (user_id, user_id, username))
+            bump_table_versions(cursor, 'users', 'mis_data', 'leads')
+            conn.commit()
+            return user_id
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return None
+
+def update_password_hash(user_id, password_hash):
+    """Replace a user's password hash"""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
         conn.commit()
-        user_id = cursor.lastrowid
-        conn.close()
-        return user_id
-    except sqlite3.IntegrityError:
-        conn.close()
-        return None
 
-def update_user_login(user_id, location=None):
-    """Update user's last login time and location"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE users 
-        SET last_login = CURRENT_TIMESTAMP, login_location = ?
-        WHERE id = ?
-    ''', (location, user_id))
-    conn.commit()
-    conn.close()
+def write_audit_batch(logins, locations):
+    """Write a batch of queued audit events in one transaction.
 
-def log_login(user_id, ip_address, location, user_agent):
-    """Log user login"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO login_logs (user_id, ip_address, location, user_agent)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, ip_address, location, user_agent))
-    conn.commit()
-    conn.close()
+    logins holds (user_id, login_time, ip_address, location, user_agent)
+    tuples and locations (user_id, ip_address, location) tuples for
+    logins whose location was resolved after they were recorded.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        if logins:
+            cursor.executemany('''
+                INSERT INTO login_logs (user_id, login_time, ip_address, location, user_agent)
+                VALUES (?, ?, ?, ?, ?)
+            ''', logins)
+            # Only each user's latest login ends up in users.last_login
+            latest = {}
+            for user_id, login_time, _, location, _ in logins:
+                latest[user_id] = (login_time, location, user_id)
+            cursor.executemany('''
+                UPDATE users 
+                SET last_login = ?, login_location = COALESCE(?, login_location)
+                WHERE id = ?
+            ''', list(latest.values()))
+        if locations:
+            cursor.executemany('''
+                UPDATE login_logs SET location = ?
+                WHERE user_id = ? AND ip_address = ? AND location IS NULL
+            ''', [(location, user_id, ip_address) for user_id, ip_address, location in locations])
+            cursor.executemany(
+                'UPDATE users SET login_location = ? WHERE id = ?',
+                [(location, user_id) for user_id, _, location in locations]
+            )
+        bump_table_versions(cursor, 'login_logs')
+        conn.commit()
 
 def get_team_members(team_leader_id):
     """Get all team members for a team leader"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE team_leader_id = ?', (team_leader_id,))
-    members = cursor.fetchall()
-    conn.close()
-    return members
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE team_leader_id = ?', (team_leader_id,))
+        return cursor.fetchall()
 
 def get_all_users():
     """Get all users"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users ORDER BY created_at DESC')
-    users = cursor.fetchall()
-    conn.close()
-    return users 
\ No newline at end of file
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users ORDER BY created_at DESC')
+        return cursor.fetchall()
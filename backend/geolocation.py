@@ -0,0 +1,172 @@
+"""Login geolocation resolved off the request path.
+
+The login route records the login immediately and queues the client IP
+here. A background worker resolves it through the configured resolver and
+hands the result to the audit writer, which fills in login_logs.location
+and users.login_location. Resolved IPs are kept in an LRU cache, so repeat
+logins from the same address get their location without a lookup.
+"""
+import ipaddress
+import queue
+import threading
+import requests
+from config import Config
+from backend.cache import TTLCache
+from backend.audit import get_audit_writer
+
+
+class IpApiResolver:
+    """Resolve IPs with the ip-api.com JSON service"""
+
+    def __init__(self, url=None, timeout=None):
+        self.url = url or Config.LOCATION_API_URL
+        self.timeout = timeout or Config.LOCATION_API_TIMEOUT
+
+    def __call__(self, ip_address):
+        """Return "City, Country" or None if the lookup failed"""
+        # Private addresses can't be geolocated; ip-api then reports the server's location
+        url = self.url if is_private_ip(ip_address) else f"{self.url}{ip_address}"
+        response = requests.get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if data.get('status') == 'fail':
+            return None
+        return f"{data.get('city', 'Unknown')}, {data.get('country', 'Unknown')}"
+
+
+class OfflineResolver:
+    """Resolve IPs without network access - a stand-in for tests and benchmarks"""
+
+    def __init__(self, locations=None, default='Unknown'):
+        self.locations = dict(locations or {})
+        self.default = default
+
+    def __call__(self, ip_address):
+        """Return the configured location for an IP"""
+        if ip_address in self.locations:
+            return self.locations[ip_address]
+        if is_private_ip(ip_address):
+            return 'Local network'
+        return self.default
+
+
+RESOLVERS = {
+    'ip-api': IpApiResolver,
+    'offline': OfflineResolver,
+}
+
+
+def is_private_ip(ip_address):
+    """Check if an address is private, loopback or unparseable"""
+    try:
+        address = ipaddress.ip_address(ip_address)
+    except (TypeError, ValueError):
+        return True
+    return address.is_private or address.is_loopback
+
+
+class LocationWorker:
+    """Background thread resolving queued login IPs.
+
+    write_back(user_id, ip_address, location) records each result.
+    """
+
+    def __init__(self, resolver, write_back, cache_size=4096, cache_ttl=86400.0, queue_size=1000):
+        self.resolver = resolver
+        self.write_back = write_back
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._metrics = {'queued': 0, 'resolved': 0, 'failed': 0, 'dropped': 0}
+
+    def cached(self, ip_address):
+        """Return the cached location of an IP, or None"""
+        return self.cache.get(ip_address)
+
+    def submit(self, ip_address, user_id):
+        """Queue an IP for resolution; returns False if the queue is full"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((ip_address, user_id))
+        except queue.Full:
+            with self._lock:
+                self._metrics['dropped'] += 1
+            return False
+        with self._lock:
+            self._metrics['queued'] += 1
+        return True
+
+    def _ensure_started(self):
+        """Start the worker thread on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name='location-worker', daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        """Resolve queued IPs until the process exits"""
+        while True:
+            ip_address, user_id = self._queue.get()
+            try:
+                self.process(ip_address, user_id)
+            finally:
+                self._queue.task_done()
+
+    def process(self, ip_address, user_id):
+        """Resolve one IP and write the location back"""
+        location = self.cached(ip_address)
+        if location is None:
+            try:
+                location = self.resolver(ip_address)
+            except Exception as e:
+                print(f"Location lookup error (non-critical): {e}")
+                location = None
+            if location is None:
+                with self._lock:
+                    self._metrics['failed'] += 1
+                location = 'Unknown'
+            else:
+                self.cache.set(ip_address, location)
+                with self._lock:
+                    self._metrics['resolved'] += 1
+        try:
+            self.write_back(user_id, ip_address, location)
+        except Exception as e:
+            print(f"Location write-back error (non-critical): {e}")
+
+    def join(self):
+        """Block until every queued IP has been processed"""
+        self._queue.join()
+
+    def stats(self):
+        """Return worker metrics"""
+        with self._lock:
+            stats = dict(self._metrics)
+        stats['pending'] = self._queue.qsize()
+        stats['cache'] = self.cache.stats()
+        return stats
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_location_worker():
+    """Return the process-wide location worker, creating it on first use"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = LocationWorker(
+                    RESOLVERS[Config.LOCATION_RESOLVER](),
+                    get_audit_writer().record_location,
+                    cache_size=Config.LOCATION_CACHE_SIZE,
+                    cache_ttl=Config.LOCATION_CACHE_TTL,
+                    queue_size=Config.LOCATION_QUEUE_SIZE
+                )
+    return _worker
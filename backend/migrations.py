@@ -0,0 +1,220 @@
+"""Versioned schema migrations applied on top of the base tables created by init_db"""
+import sqlite3
+from backend.rollups import create_mis_rollup, rebuild_mis_rollup
+
+def _column_names(cursor, table):
+    """Get the column names of a table"""
+    return {row['name'] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+
+def _add_column(cursor, table, column, definition):
+    """Add a column unless it already exists"""
+    if column not in _column_names(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def migrate_mis_record_key(cursor):
+    """Give mis_data a unique natural key (LEAD ID, else APPLICATION NUMBER)"""
+    _add_column(cursor, 'mis_data', 'record_key', 'TEXT')
+
+    # Older loads stored missing cells as the string 'nan'
+    cursor.execute("""
+        UPDATE mis_data
+        SET record_key = COALESCE(
+            NULLIF(NULLIF(TRIM(lead_id), ''), 'nan'),
+            NULLIF(NULLIF(TRIM(application_number), ''), 'nan')
+        )
+        WHERE record_key IS NULL
+    """)
+
+    # Re-running the loader duplicated every record; keep the latest copy
+    cursor.execute("""
+        DELETE FROM mis_data
+        WHERE record_key IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM mis_data
+            WHERE record_key IS NOT NULL
+            GROUP BY record_key
+        )
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_mis_data_record_key ON mis_data (record_key)")
+
+def migrate_query_indexes(cursor):
+    """Index the columns the role-scoped queries in progress.py and mis.py filter on.
+
+    Each filter column is paired with the date column of its time window so
+    the OR'ed ownership conditions become a MULTI-INDEX OR of range searches.
+    """
+    indexes = [
+        ('idx_mis_data_upload_date', 'mis_data', 'upload_date'),
+        ('idx_mis_data_username', 'mis_data', 'username, upload_date'),
+        ('idx_mis_data_uploaded_by', 'mis_data', 'uploaded_by, upload_date'),
+        ('idx_mis_data_team_leader_name', 'mis_data', 'team_leader_name'),
+        ('idx_leads_created_at', 'leads', 'created_at'),
+        ('idx_leads_created_by', 'leads', 'created_by, created_at'),
+        ('idx_leads_assigned_to', 'leads', 'assigned_to, created_at'),
+        ('idx_leads_status', 'leads', 'status, created_at'),
+        ('idx_leads_campaign_tag', 'leads', 'campaign_tag, status'),
+        ('idx_login_logs_user_id', 'login_logs', 'user_id, login_time'),
+        ('idx_login_logs_login_time', 'login_logs', 'login_time'),
+        ('idx_users_team_leader_id', 'users', 'team_leader_id'),
+    ]
+    for name, table, columns in indexes:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+def migrate_mis_dsa_owner(cursor):
+    """Resolve the DSA encoded in FORM CAMPAIGN_ID to an indexed owning user ID.
+
+    mis_data.username already holds the DSA extracted at ingest; role-scoped
+    reads filter on dsa_user_id instead of LIKE-matching the campaign ID.
+    """
+    _add_column(cursor, 'mis_data', 'dsa_user_id', 'INTEGER REFERENCES users (id)')
+    cursor.execute("""
+        UPDATE mis_data
+        SET dsa_user_id = (
+            SELECT u.id FROM users u WHERE UPPER(u.username) = mis_data.username
+        )
+        WHERE dsa_user_id IS NULL AND username != ''
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mis_data_dsa_user_id ON mis_data (dsa_user_id, upload_date)")
+
+def migrate_table_versions(cursor):
+    """Per-table change counters that analytics result caches are validated against"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)",
+        [('users',), ('leads',), ('mis_data',), ('login_logs',)]
+    )
+
+def migrate_mis_daily_rollup(cursor):
+    """Daily MIS rollup for the role-scoped analytics, built from existing rows"""
+    create_mis_rollup(cursor)
+    rebuild_mis_rollup(cursor)
+
+# Rows updated per statement by backfills on large tables
+BACKFILL_CHUNK_SIZE = 5000
+
+def migrate_lead_owner_ids(cursor):
+    """Resolve lead ownership to indexed user IDs.
+
+    created_by_id is the creating user (leads.created_by holds a username)
+    and owner_user_id the effective owner: the assignee, else the creator.
+    A lead belongs to a user when either column matches, so ownership
+    queries become equality lookups on integer indexes instead of an OR of
+    a username match and an ID match.
+
+    Existing leads are backfilled in id order, BACKFILL_CHUNK_SIZE rows per
+    transaction, committing between chunks so the write lock is released
+    and dashboard writers are not held up for the whole table. That is
+    safe to interrupt: the columns are additive and each chunk only fills
+    rows still NULL, so a rerun (or a concurrent bootstrap that takes the
+    lock between chunks) picks up where it stopped.
+    """
+    _add_column(cursor, 'leads', 'created_by_id', 'INTEGER REFERENCES users (id)')
+    _add_column(cursor, 'leads', 'owner_user_id', 'INTEGER REFERENCES users (id)')
+
+    last_id = 0
+    while True:
+        cursor.execute(
+            "SELECT MAX(id) AS id FROM (SELECT id FROM leads WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, BACKFILL_CHUNK_SIZE)
+        )
+        chunk_end = cursor.fetchone()['id']
+        if chunk_end is None:
+            break
+        # Look the creator up once per row, then derive the owner from it
+        cursor.execute("""
+            UPDATE leads
+            SET created_by_id = (SELECT u.id FROM users u WHERE u.username = leads.created_by)
+            WHERE id > ? AND id <= ? AND created_by_id IS NULL
+        """, (last_id, chunk_end))
+        cursor.execute("""
+            UPDATE leads
+            SET owner_user_id = COALESCE(assigned_to, created_by_id)
+            WHERE id > ? AND id <= ? AND owner_user_id IS NULL
+        """, (last_id, chunk_end))
+        cursor.connection.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+        last_id = chunk_end
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_created_by_id ON leads (created_by_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_owner_user_id ON leads (owner_user_id, created_at)")
+
+# (version, description, migration) - append only, never renumber
+MIGRATIONS = [
+    (1, "mis_data natural key for incremental loads", migrate_mis_record_key),
+    (2, "indexes for role-scoped lead, MIS and login queries", migrate_query_indexes),
+    (3, "mis_data DSA ownership resolved to dsa_user_id", migrate_mis_dsa_owner),
+    (4, "table version counters for analytics caching", migrate_table_versions),
+    (5, "daily MIS rollup for analytics", migrate_mis_daily_rollup),
+    (6, "leads ownership resolved to created_by_id and owner_user_id", migrate_lead_owner_ids),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def read_schema_version(conn):
+    """Get the applied migration version with a single read and no DDL.
+
+    Returns 0 for a database that has never been bootstrapped.
+    """
+    try:
+        row = conn.execute("SELECT MAX(version) AS version FROM schema_migrations").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row['version'] or 0
+
+def schema_is_current(conn):
+    """Check if every migration has been applied"""
+    return read_schema_version(conn) >= LATEST_VERSION
+
+def get_schema_version(conn):
+    """Get the highest applied migration version"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT MAX(version) AS version FROM schema_migrations")
+    return cursor.fetchone()['version'] or 0
+
+def run_migrations(conn):
+    """Apply every pending migration, each in its own transaction.
+
+    A long backfill may commit part-way through its migration (see
+    migrate_lead_owner_ids); the version row is only written once the
+    migration has finished.
+    """
+    current = get_schema_version(conn)
+    cursor = conn.cursor()
+    applied = []
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            # Take the write lock first so a concurrent bootstrap can't apply it twice
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,))
+            if cursor.fetchone():
+                conn.commit()
+                continue
+            migrate(cursor)
+            # OR IGNORE: a concurrent bootstrap may have finished the same
+            # migration while this one had released the lock between chunks
+            cursor.execute(
+                "INSERT OR IGNORE INTO schema_migrations (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied migration {version}: {description}")
+        applied.append(version)
+
+    return applied
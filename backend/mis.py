@@ -1,9 +1,85 @@
 import pandas as pd
 import os
-from backend.db import get_db_connection, get_user_by_id, get_team_members
+from backend.db import get_db_connection, get_table_columns, bump_table_versions
+from backend.pagination import InvalidFields, keyset_clause, project_fields, validate_fields
+from backend.rollups import apply_mis_rollup, prune_mis_rollup, mis_high_water
+from backend.scope import resolve_scope
 from config import Config
 import json
 
+# HSBC MIS file header -> mis_data column, in insert order
+MIS_COLUMN_MAP = [
+    ('Data Type', 'data_type'),
+    ('Data Received Month', 'data_received_month'),
+    ('File-Recived-Date', 'file_received_date'),
+    ('data received date', 'data_received_date'),
+    ('APPLICATION NUMBER', 'application_number'),
+    ('LEAD ID', 'lead_id'),
+    ('ADOBE LEAD ID', 'adobe_lead_id'),
+    ('CREATION DATE/TIME', 'creation_date_time'),
+    ('LAST UPDATED DATE/TIME', 'last_updated_date_time'),
+    ('APPS REF NUMBER', 'apps_ref_number'),
+    ('FORM:SOURCE', 'form_source'),
+    ('FORM CAMPAIGN_ID', 'form_campaign_id'),
+    ('WT:AC', 'wt_ac'),
+    ('GCLID', 'gclid'),
+    ('APPLICATION STATUS', 'application_status'),
+    ('DIP  STATUS', 'dip_status'),
+    ('CUSTOMER DROPPED PAGE', 'customer_dropped_page'),
+    ('LEAD GENERATION STAGE', 'lead_generation_stage'),
+    ('CARD TYPE', 'card_type'),
+    ('CHANNEL', 'channel'),
+    ('FRN NUMBER', 'frn_number'),
+    ('DEVICE TYPE', 'device_type'),
+    ('BROWSER', 'browser'),
+    ('HAS SKIPPED PERFIOS', 'has_skipped_perfios'),
+    ('Campaign', 'campaign'),
+    ('Process-Flag', 'process_flag'),
+    ('vaibhav Journey-completed-/-Drop-off', 'vaibhav_journey_completed_dropoff'),
+    ('Status', 'status'),
+    ('Disposition', 'disposition'),
+    ('Called-Date', 'called_date'),
+    ('Remarks', 'remarks'),
+    ('Attempt', 'attempt'),
+    ('FRN', 'frn'),
+    ('Signzy', 'signzy'),
+    ('Signzy-Date', 'signzy_date'),
+    ('Agent-Remark-VICP', 'agent_remark_vicp'),
+    ('VCIP-Auto-login-URL', 'vcip_auto_login_url'),
+    ('STB-Status', 'stb_status'),
+    ('STB Date', 'stb_date'),
+    ('Booking-Date', 'booking_date'),
+    ('Booking-Status', 'booking_status'),
+    ('Remarks.1', 'remarks_1'),
+    ('DECLINE_CLASS', 'decline_class'),
+    ('DECLINE_CATEGORY', 'decline_category'),
+    ('Booking-Month', 'booking_month'),
+    ('FINAL_CHANNEL_FLAG1', 'final_channel_flag1'),
+    ('Decline-Code', 'decline_code'),
+    ('Declined-By', 'declined_by'),
+    ('Decline-Description', 'decline_description'),
+    ('CJ', 'cj'),
+    ('CJ-Received-Date', 'cj_received_date'),
+    ('CJ-Status', 'cj_status'),
+    ('CJ-Remarks', 'cj_remarks'),
+    ('Upload date', 'upload_date_field'),
+    ('WIP Que Name', 'wip_que_name'),
+    ('CREATION Month', 'creation_month'),
+    ('CREATION DATE', 'creation_date'),
+    ('As Per Creation Date', 'as_per_creation_date'),
+    ('AS Per VCIP Completed', 'as_per_vcip_completed'),
+    ('COMPANY Name', 'company_name'),
+    ('team_leader_name', 'team_leader_name'),
+]
+
+# Columns written for every MIS row; the last three come from the upload itself
+MIS_INSERT_COLUMNS = [column for _, column in MIS_COLUMN_MAP] + [
+    'username', 'record_key', 'dsa_user_id', 'uploaded_by', 'created_by', 'file_name'
+]
+
+# FORM CAMPAIGN_ID fragments that mark system (non-DSA) campaigns
+NON_DSA_PATTERNS = ['CHKR', 'ENKR', 'AF', 'PS', 'CCCAMPAIGN', 'TQ', 'BNKR', 'FBA', 'PAID']
+
 def validate_mis_data(df):
     """Validate MIS data structure for HSBC MIS file"""
     # Check if FORM CAMPAIGN_ID exists (this is the key field for filtering)
@@ -18,131 +94,226 @@ def validate_mis_data(df):
     
     return True, "Data validation successful"
 
-def process_mis_data(df, uploaded_by, created_by, file_name):
+def _to_text(series):
+    """Cast a column to text the way str() would, with blanks for missing values"""
+    return series.astype(str).where(series.notna(), '')
+
+def get_dsa_user_ids(cursor):
+    """Map upper-cased usernames to user IDs for resolving DSA ownership"""
+    cursor.execute("SELECT id, UPPER(username) AS username FROM users")
+    return {row['username']: row['id'] for row in cursor.fetchall()}
+
+def prepare_mis_frame(df, dsa_user_ids=None):
+    """Rename and cast an MIS DataFrame into mis_data columns.
+
+    dsa_user_ids (see get_dsa_user_ids) resolves the DSA username extracted
+    from FORM CAMPAIGN_ID to the owning user; unknown DSAs get no owner.
+    """
+    frame = pd.DataFrame(index=df.index)
+    for header, column in MIS_COLUMN_MAP:
+        frame[column] = _to_text(df[header]) if header in df.columns else ''
+    frame['username'] = extract_usernames(frame['form_campaign_id'])
+    dsa_user_ids = dsa_user_ids or {}
+    frame['dsa_user_id'] = pd.Series(
+        [dsa_user_ids.get(username) for username in frame['username']],
+        index=frame.index, dtype=object
+    )
+    
+    # Natural key for incremental loads: LEAD ID, else APPLICATION NUMBER
+    lead_id = frame['lead_id'].str.strip()
+    application_number = frame['application_number'].str.strip()
+    record_key = lead_id.where(lead_id != '', application_number)
+    frame['record_key'] = record_key.astype(object).where(record_key != '', None)
+    return frame
+
+def _mis_row_values(frame, uploaded_by, created_by, file_name):
+    """Build INSERT parameter tuples (in MIS_INSERT_COLUMNS order) from a prepared frame"""
+    upload_values = (uploaded_by, created_by, file_name)
+    return [
+        values + upload_values
+        for values in zip(*(frame[column].tolist() for column in MIS_INSERT_COLUMNS[:-3]))
+    ]
+
+def _execute_chunk(cursor, sql, rows, first_row):
+    """executemany under a savepoint, retrying row by row if the chunk fails.
+
+    Returns (success_count, error_count).
+    """
+    if not rows:
+        return 0, 0
+    cursor.execute("SAVEPOINT mis_chunk")
+    try:
+        cursor.executemany(sql, rows)
+        success_count, error_count = len(rows), 0
+    except Exception as e:
+        print(f"Error writing MIS rows from row {first_row}, retrying individually: {e}")
+        cursor.execute("ROLLBACK TO mis_chunk")
+        success_count = error_count = 0
+        for offset, values in enumerate(rows):
+            try:
+                cursor.execute(sql, values)
+                success_count += 1
+            except Exception as row_error:
+                print(f"Error writing MIS row {first_row + offset}: {row_error}")
+                error_count += 1
+    cursor.execute("RELEASE mis_chunk")
+    return success_count, error_count
+
+def insert_mis_rows(cursor, frame, uploaded_by, created_by, file_name, row_offset=0):
+    """Insert prepared MIS rows in chunks, returning (success_count, error_count)"""
+    placeholders = ', '.join(['?'] * len(MIS_INSERT_COLUMNS))
+    sql = f"INSERT INTO mis_data ({', '.join(MIS_INSERT_COLUMNS)}) VALUES ({placeholders})"
+    rows = _mis_row_values(frame, uploaded_by, created_by, file_name)
+
+    success_count = 0
+    error_count = 0
+    for start in range(0, len(rows), Config.MIS_BATCH_SIZE):
+        high_water = mis_high_water(cursor)
+        inserted, failed = _execute_chunk(
+            cursor, sql, rows[start:start + Config.MIS_BATCH_SIZE], row_offset + start
+        )
+        apply_mis_rollup(cursor, "id > ?", (high_water,))
+        success_count += inserted
+        error_count += failed
+    return success_count, error_count
+
+def upsert_mis_rows(cursor, frame, uploaded_by, created_by, file_name, row_offset=0):
+    """Insert new MIS records and refresh changed ones, keyed on record_key.
+
+    A record whose LAST UPDATED DATE/TIME matches the stored copy is skipped;
+    rows without a LEAD ID or APPLICATION NUMBER are always inserted.
+    Returns a dict of inserted/updated/skipped/error counts.
+    """
+    key_index = MIS_INSERT_COLUMNS.index('record_key')
+    updated_index = MIS_INSERT_COLUMNS.index('last_updated_date_time')
+    update_columns = [column for column in MIS_INSERT_COLUMNS if column != 'record_key']
+    
+    placeholders = ', '.join(['?'] * len(MIS_INSERT_COLUMNS))
+    insert_sql = f"INSERT INTO mis_data ({', '.join(MIS_INSERT_COLUMNS)}) VALUES ({placeholders})"
+    update_sql = f"""
+        UPDATE mis_data
+        SET {', '.join(f'{column} = ?' for column in update_columns)}, upload_date = CURRENT_TIMESTAMP
+        WHERE record_key = ?
+    """
+    rows = _mis_row_values(frame, uploaded_by, created_by, file_name)
+
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+    for start in range(0, len(rows), Config.MIS_BATCH_SIZE):
+        chunk = rows[start:start + Config.MIS_BATCH_SIZE]
+        keys = [row[key_index] for row in chunk if row[key_index] is not None]
+        cursor.execute("""
+            SELECT record_key, last_updated_date_time FROM mis_data
+            WHERE record_key IN (SELECT value FROM json_each(?))
+        """, (json.dumps(keys),))
+        stored = {row['record_key']: row['last_updated_date_time'] for row in cursor.fetchall()}
+        
+        inserts = []
+        updates = []
+        for row in chunk:
+            key = row[key_index]
+            if key is None:
+                inserts.append(row)
+                continue
+            if key in stored:
+                if stored[key] == row[updated_index]:
+                    counts['skipped'] += 1
+                    continue
+                updates.append(row[:key_index] + row[key_index + 1:] + (key,))
+            else:
+                inserts.append(row)
+            stored[key] = row[updated_index]
+        
+        # Keep the daily rollup in step: take updated records out, write, add
+        # the new rows and the updated records' new state back
+        updated_keys = json.dumps([row[-1] for row in updates])
+        high_water = mis_high_water(cursor)
+        if updates:
+            apply_mis_rollup(cursor, "record_key IN (SELECT value FROM json_each(?))", (updated_keys,), sign=-1)
+        
+        inserted, failed = _execute_chunk(cursor, insert_sql, inserts, row_offset + start)
+        counts['inserted'] += inserted
+        counts['errors'] += failed
+        updated, failed = _execute_chunk(cursor, update_sql, updates, row_offset + start)
+        counts['updated'] += updated
+        counts['errors'] += failed
+        
+        apply_mis_rollup(
+            cursor, "id > ? OR record_key IN (SELECT value FROM json_each(?))", (high_water, updated_keys)
+        )
+    return counts
+
+def process_mis_data(df, uploaded_by, created_by, file_name, incremental=True):
     """Process and store MIS data in database"""
+    return process_mis_batches([df], uploaded_by, created_by, file_name, incremental=incremental)
+
+def process_mis_batches(batches, uploaded_by, created_by, file_name, on_batch=None, incremental=True):
+    """Process and store MIS data arriving as a stream of DataFrames.
+
+    All batches are written in a single transaction. on_batch, if given, is
+    called with every raw batch so callers can analyse the file in the same pass.
+    In incremental mode records already loaded are updated or skipped (see
+    upsert_mis_rows); otherwise every row is inserted and a record that is
+    already present counts as an error.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Validate data
-        is_valid, message = validate_mis_data(df)
-        if not is_valid:
-            return False, message
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        total_rows = 0
+        system_rows = 0
+        validated = False
+        dsa_user_ids = get_dsa_user_ids(cursor)
         
-        # Process each row
-        success_count = 0
-        error_count = 0
+        for df in batches:
+            # Validate data
+            if not validated:
+                is_valid, message = validate_mis_data(df)
+                if not is_valid:
+                    conn.rollback()
+                    return False, message
+                validated = True
+                if not conn.in_transaction:
+                    cursor.execute("BEGIN")
+            
+            if on_batch:
+                on_batch(df)
+            
+            frame = prepare_mis_frame(df, dsa_user_ids)
+            system_rows += int((frame['username'] == '').sum())
+            if incremental:
+                batch_counts = upsert_mis_rows(
+                    cursor, frame, uploaded_by, created_by, file_name, row_offset=total_rows
+                )
+            else:
+                inserted, failed = insert_mis_rows(
+                    cursor, frame, uploaded_by, created_by, file_name, row_offset=total_rows
+                )
+                batch_counts = {'inserted': inserted, 'errors': failed}
+            for name, value in batch_counts.items():
+                counts[name] += value
+            total_rows += len(df)
         
-        for index, row in df.iterrows():
-            try:
-                # Extract username from FORM CAMPAIGN_ID
-                form_campaign_id = str(row.get('FORM CAMPAIGN_ID', ''))
-                username = extract_username_from_campaign_id(form_campaign_id)
-                
-                # For now, process all campaigns (including system campaigns)
-                # When DSA campaigns are available, this will filter them properly
-                if not is_dsa_campaign(form_campaign_id):
-                    print(f"Processing system campaign: {form_campaign_id}")
-                    # Don't skip system campaigns for now since that's all we have
-                
-                cursor.execute("""
-                    INSERT INTO mis_data 
-                    (data_type, data_received_month, file_received_date, data_received_date,
-                     application_number, lead_id, adobe_lead_id, creation_date_time, 
-                     last_updated_date_time, apps_ref_number, form_source, form_campaign_id,
-                     wt_ac, gclid, application_status, dip_status, customer_dropped_page,
-                     lead_generation_stage, card_type, channel, frn_number, device_type,
-                     browser, has_skipped_perfios, campaign, process_flag, 
-                     vaibhav_journey_completed_dropoff, status, disposition, called_date,
-                     remarks, attempt, frn, signzy, signzy_date, agent_remark_vicp,
-                     vcip_auto_login_url, stb_status, stb_date, booking_date, booking_status,
-                     remarks_1, decline_class, decline_category, booking_month, 
-                     final_channel_flag1, decline_code, declined_by, decline_description,
-                     cj, cj_received_date, cj_status, cj_remarks, upload_date_field,
-                     wip_que_name, creation_month, creation_date, as_per_creation_date,
-                     as_per_vcip_completed, company_name, username, team_leader_name,
-                     uploaded_by, created_by, file_name)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    str(row.get('Data Type', '')),
-                    str(row.get('Data Received Month', '')),
-                    str(row.get('File-Recived-Date', '')),
-                    str(row.get('data received date', '')),
-                    str(row.get('APPLICATION NUMBER', '')),
-                    str(row.get('LEAD ID', '')),
-                    str(row.get('ADOBE LEAD ID', '')),
-                    str(row.get('CREATION DATE/TIME', '')),
-                    str(row.get('LAST UPDATED DATE/TIME', '')),
-                    str(row.get('APPS REF NUMBER', '')),
-                    str(row.get('FORM:SOURCE', '')),
-                    form_campaign_id,
-                    str(row.get('WT:AC', '')),
-                    str(row.get('GCLID', '')),
-                    str(row.get('APPLICATION STATUS', '')),
-                    str(row.get('DIP  STATUS', '')),
-                    str(row.get('CUSTOMER DROPPED PAGE', '')),
-                    str(row.get('LEAD GENERATION STAGE', '')),
-                    str(row.get('CARD TYPE', '')),
-                    str(row.get('CHANNEL', '')),
-                    str(row.get('FRN NUMBER', '')),
-                    str(row.get('DEVICE TYPE', '')),
-                    str(row.get('BROWSER', '')),
-                    str(row.get('HAS SKIPPED PERFIOS', '')),
-                    str(row.get('Campaign', '')),
-                    str(row.get('Process-Flag', '')),
-                    str(row.get('vaibhav Journey-completed-/-Drop-off', '')),
-                    str(row.get('Status', '')),
-                    str(row.get('Disposition', '')),
-                    str(row.get('Called-Date', '')),
-                    str(row.get('Remarks', '')),
-                    str(row.get('Attempt', '')),
-                    str(row.get('FRN', '')),
-                    str(row.get('Signzy', '')),
-                    str(row.get('Signzy-Date', '')),
-                    str(row.get('Agent-Remark-VICP', '')),
-                    str(row.get('VCIP-Auto-login-URL', '')),
-                    str(row.get('STB-Status', '')),
-                    str(row.get('STB Date', '')),
-                    str(row.get('Booking-Date', '')),
-                    str(row.get('Booking-Status', '')),
-                    str(row.get('Remarks.1', '')),
-                    str(row.get('DECLINE_CLASS', '')),
-                    str(row.get('DECLINE_CATEGORY', '')),
-                    str(row.get('Booking-Month', '')),
-                    str(row.get('FINAL_CHANNEL_FLAG1', '')),
-                    str(row.get('Decline-Code', '')),
-                    str(row.get('Declined-By', '')),
-                    str(row.get('Decline-Description', '')),
-                    str(row.get('CJ', '')),
-                    str(row.get('CJ-Received-Date', '')),
-                    str(row.get('CJ-Status', '')),
-                    str(row.get('CJ-Remarks', '')),
-                    str(row.get('Upload date', '')),
-                    str(row.get('WIP Que Name', '')),
-                    str(row.get('CREATION Month', '')),
-                    str(row.get('CREATION DATE', '')),
-                    str(row.get('As Per Creation Date', '')),
-                                    str(row.get('AS Per VCIP Completed', '')),
-                str(row.get('COMPANY Name', '')),
-                username,
-                str(row.get('team_leader_name', '')),
-                uploaded_by,
-                created_by
-                ))
-                success_count += 1
-                
-            except Exception as e:
-                print(f"Error inserting row {index}: {e}")
-                error_count += 1
-                continue
+        if not validated:
+            return False, "No MIS data found"
         
+        if counts['inserted'] or counts['updated']:
+            prune_mis_rollup(cursor)
+            bump_table_versions(cursor, 'mis_data')
         conn.commit()
         
+        # System campaigns are loaded too until DSA campaigns are available
+        if system_rows:
+            print(f"Processed {system_rows} system campaign rows")
+        
         return True, {
             "message": "MIS data processed successfully",
-            "success_count": success_count,
-            "error_count": error_count,
-            "total_rows": len(df)
+            "success_count": counts['inserted'] + counts['updated'],
+            "error_count": counts['errors'],
+            "inserted_count": counts['inserted'],
+            "updated_count": counts['updated'],
+            "skipped_count": counts['skipped'],
+            "total_rows": total_rows
         }
         
     except Exception as e:
@@ -152,6 +323,57 @@ def process_mis_data(df, uploaded_by, created_by, file_name):
     finally:
         conn.close()
 
+def _dedupe_headers(header):
+    """Name header cells the way pandas.read_excel does (Unnamed: n, Remarks.1)"""
+    columns = []
+    seen = {}
+    for index, name in enumerate(header):
+        name = f"Unnamed: {index}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+def read_mis_excel_batches(file_path, sheet_name='Main', batch_size=None):
+    """Stream an MIS workbook sheet as DataFrames of at most batch_size rows.
+
+    Uses openpyxl's read-only mode, so only one batch of cells is held in
+    memory at a time regardless of the workbook size. A sheet with a header
+    but no data yields a single empty DataFrame.
+    """
+    from openpyxl import load_workbook
+    
+    batch_size = batch_size or Config.MIS_BATCH_SIZE
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _dedupe_headers(header)
+        width = len(columns)
+        
+        batch = []
+        yielded = False
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            if len(row) != width:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=columns, dtype=object)
+                yielded = True
+                batch = []
+        
+        if batch or not yielded:
+            yield pd.DataFrame(batch, columns=columns, dtype=object)
+    finally:
+        workbook.close()
+
 def extract_username_from_campaign_id(campaign_id):
     """Extract DSA username from FORM CAMPAIGN_ID"""
     if not campaign_id:
@@ -166,11 +388,8 @@ def extract_username_from_campaign_id(campaign_id):
     # Remove PPIPL_ prefix
     campaign_part = campaign_id[6:]  # Remove "PPIPL_"
     
-    # Define NON-DSA patterns that should be filtered out
-    non_dsa_patterns = ['CHKR', 'ENKR', 'AF', 'PS', 'CCCAMPAIGN', 'TQ', 'BNKR', 'FBA', 'PAID']
-    
     # If it contains any non-DSA pattern, return empty (not a DSA lead)
-    for pattern in non_dsa_patterns:
+    for pattern in NON_DSA_PATTERNS:
         if pattern in campaign_part:
             return ''
     
@@ -185,6 +404,21 @@ def extract_username_from_campaign_id(campaign_id):
     
     return ''
 
+def extract_usernames(campaign_ids):
+    """Vectorized extract_username_from_campaign_id over a Series of campaign IDs"""
+    campaign_ids = campaign_ids.fillna('').astype(str).str.upper()
+    campaign_part = campaign_ids.str[6:]
+    dsa_id = campaign_part.str.split('_', n=1).str[0]
+    
+    is_dsa = (
+        campaign_ids.str.startswith('PPIPL_')
+        & ~campaign_part.str.contains('|'.join(NON_DSA_PATTERNS), regex=True)
+        & (dsa_id.str.len() >= 3)
+        & dsa_id.str.contains(r'\d', regex=True)
+        & dsa_id.str.contains(r'[^\W\d_]', regex=True)
+    )
+    return dsa_id.where(is_dsa, '')
+
 def is_dsa_campaign(campaign_id):
     """Check if FORM CAMPAIGN_ID belongs to a DSA (not system campaigns)"""
     if not campaign_id:
@@ -192,11 +426,8 @@ def is_dsa_campaign(campaign_id):
     
     campaign_id = str(campaign_id).upper()
         
-    # Non-DSA patterns that should be filtered out
-    non_dsa_patterns = ['CHKR', 'ENKR', 'AF', 'PS', 'CCCAMPAIGN', 'TQ', 'BNKR', 'FBA', 'PAID']
-    
     # Check if it contains any non-DSA pattern
-    for pattern in non_dsa_patterns:
+    for pattern in NON_DSA_PATTERNS:
         if pattern in campaign_id:
             return False
     
@@ -204,61 +435,57 @@ def is_dsa_campaign(campaign_id):
 
 
 
-def get_mis_data(user_id, role, team_leader_id=None):
-    """Get MIS data based on user role hierarchy"""
+def _mis_scope(user_id, role, team_leader_id=None):
+    """WHERE condition and params limiting mis_data (aliased md) to a role's rows"""
+    # Admin sees all MIS data, a team leader their team's DSA leads and their own uploads,
+    # a user only their own DSA leads
+    return resolve_scope(user_id, role, team_leader_id).mis_condition()
+
+# Computed MIS fields that may be requested alongside mis_data columns
+MIS_COMPUTED_FIELDS = {'uploaded_by_username': 'u.username'}
+
+def mis_projection(fields=None):
+    """SELECT list for the requested MIS fields and whether it needs the users join.
+
+    Unknown fields raise backend.pagination.InvalidFields. id and upload_date
+    are always selected since they form the pagination cursor.
+    """
+    if fields is None:
+        return "md.*, u.username as uploaded_by_username", True
+    select_list, computed = project_fields(
+        fields, 'md', get_table_columns('mis_data'), MIS_COMPUTED_FIELDS,
+        required=('id', 'upload_date')
+    )
+    return select_list, bool(computed)
+
+def get_mis_data(user_id, role, team_leader_id=None, limit=None, after=None, fields=None):
+    """Get MIS data based on user role hierarchy, newest first.
+
+    With limit, returns at most limit rows following the (upload_date, id)
+    sort key after - see backend.pagination. fields restricts the columns
+    read (see mis_projection).
+    """
+    select_list, join_users = mis_projection(fields)
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        if role == 'admin':
-            # Admin can see all MIS data (including system campaigns)
-            cursor.execute("""
-                SELECT md.*, u.username as uploaded_by_username
-                FROM mis_data md
-                LEFT JOIN users u ON md.uploaded_by = u.id
-                ORDER BY md.upload_date DESC
-            """)
-        elif role == 'team_leader':
-            # Team leader can see their team members' DSA leads and system campaigns
-            user = get_user_by_id(user_id)
-            username = user['username'] if user else ''
-            
-            # Get team member usernames
-            team_members = get_team_members(team_leader_id)
-            team_usernames = [member['username'] for member in team_members]
-            
-            if team_usernames:
-                # Build query to show team members' DSA leads and system campaigns
-                team_conditions = ' OR '.join([f"md.form_campaign_id LIKE '%{member}%'" for member in team_usernames])
-                cursor.execute(f"""
-                    SELECT md.*, u.username as uploaded_by_username
-                    FROM mis_data md
-                    LEFT JOIN users u ON md.uploaded_by = u.id
-                    WHERE ({team_conditions}) OR md.uploaded_by = ?
-                    ORDER BY md.upload_date DESC
-                """, (user_id,))
-            else:
-                cursor.execute("""
-                    SELECT md.*, u.username as uploaded_by_username
-                    FROM mis_data md
-                    LEFT JOIN users u ON md.uploaded_by = u.id
-                    WHERE md.uploaded_by = ?
-                    ORDER BY md.upload_date DESC
-                """, (user_id,))
-        else:
-            # Regular user can only see their own DSA leads (filter out system campaigns)
-            user = get_user_by_id(user_id)
-            username = user['username'] if user else ''
-            
-            # Filter by username in the mis_data table
-            cursor.execute("""
-                SELECT md.*, u.username as uploaded_by_username
-                FROM mis_data md
-                LEFT JOIN users u ON md.uploaded_by = u.id
-                WHERE md.username = ?
-                ORDER BY md.upload_date DESC
-            """, (username,))
+        scope, params = _mis_scope(user_id, role, team_leader_id)
+        keyset, keyset_params = keyset_clause('md.upload_date', 'md.id', after)
+        join = "LEFT JOIN users u ON md.uploaded_by = u.id" if join_users else ""
+        query = f"""
+            SELECT {select_list}
+            FROM mis_data md
+            {join}
+            WHERE {scope}{keyset}
+            ORDER BY md.upload_date DESC, md.id DESC
+        """
+        params = params + keyset_params
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
         
+        cursor.execute(query, params)
         return cursor.fetchall()
         
     except Exception as e:
@@ -267,6 +494,64 @@ def get_mis_data(user_id, role, team_leader_id=None):
     finally:
         conn.close()
 
+def count_mis_data(user_id, role, team_leader_id=None):
+    """Count the MIS records a role can see"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        scope, params = _mis_scope(user_id, role, team_leader_id)
+        cursor.execute(f"SELECT COUNT(*) AS total FROM mis_data md WHERE {scope}", params)
+        return cursor.fetchone()['total']
+    except Exception as e:
+        print(f"Error counting MIS data: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def aggregate_mis_data(user_id, role, team_leader_id=None, group_by=None, filters=None, top=None):
+    """Count a role's MIS records grouped by mis_data columns, largest groups first.
+
+    filters maps columns to the value they must equal; top keeps only the
+    largest groups. Unknown columns raise backend.pagination.InvalidFields.
+    Returns a list of dicts holding the group_by columns and count.
+    """
+    group_by = list(group_by or [])
+    filters = dict(filters or {})
+    if not group_by:
+        raise InvalidFields("At least one group_by column is required")
+    columns = get_table_columns('mis_data')
+    validate_fields(group_by + list(filters), columns)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        scope, params = _mis_scope(user_id, role, team_leader_id)
+        for column, value in filters.items():
+            scope += f" AND md.{column} = ?"
+            params.append(value)
+        group_list = ', '.join(f"md.{column}" for column in group_by)
+        query = f"""
+            SELECT {group_list}, COUNT(*) AS count
+            FROM mis_data md
+            WHERE {scope}
+            GROUP BY {group_list}
+            ORDER BY count DESC
+        """
+        if top is not None:
+            query += " LIMIT ?"
+            params.append(top)
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+        
+    except Exception as e:
+        print(f"Error aggregating MIS data: {e}")
+        return []
+    finally:
+        conn.close()
+
 def get_username_by_id(user_id):
     """Get username by user ID"""
     conn = get_db_connection()
@@ -301,21 +586,19 @@ def get_mis_statistics(user_id, role, team_leader_id=None):
             """)
         elif role == 'team_leader':
             # Team leader statistics
-            cursor.execute("""
+            condition, params = _mis_scope(user_id, role, team_leader_id)
+            cursor.execute(f"""
                 SELECT 
                     COUNT(*) as total_records,
                     COUNT(DISTINCT campaign_tag) as total_campaigns,
                     COUNT(DISTINCT username) as total_team_members,
                     COUNT(DISTINCT bank) as total_banks,
                     DATE(MAX(upload_date)) as last_upload_date
-                FROM mis_data
-                WHERE team_leader_name IN (
-                    SELECT username FROM users WHERE team_leader_id = ?
-                ) OR uploaded_by = ?
-            """, (team_leader_id, user_id))
+                FROM mis_data md
+                WHERE {condition}
+            """, params)
         else:
             # User statistics - only for their campaigns
-            username = get_username_by_id(user_id)
             cursor.execute("""
                 SELECT 
                     COUNT(*) as total_records,
@@ -323,8 +606,8 @@ def get_mis_statistics(user_id, role, team_leader_id=None):
                     COUNT(DISTINCT bank) as total_banks,
                     DATE(MAX(upload_date)) as last_upload_date
                 FROM mis_data
-                WHERE username = ?
-            """, (username,))
+                WHERE dsa_user_id = ?
+            """, (user_id,))
         
         stats = cursor.fetchone()
         return dict(stats) if stats else {}
@@ -341,30 +624,13 @@ def get_campaign_data(campaign_tag, user_id, role, team_leader_id=None):
     cursor = conn.cursor()
     
     try:
-        if role == 'admin':
-            cursor.execute("""
-                SELECT * FROM mis_data 
-                WHERE campaign_tag = ?
-                ORDER BY upload_date DESC
-            """, (campaign_tag,))
-        elif role == 'team_leader':
-            cursor.execute("""
-                SELECT * FROM mis_data 
-                WHERE campaign_tag = ? AND (
-                    team_leader_name IN (
-                        SELECT username FROM users WHERE team_leader_id = ?
-                    ) OR uploaded_by = ?
-                )
-                ORDER BY upload_date DESC
-            """, (campaign_tag, team_leader_id, user_id))
-        else:
-            # User can only see campaigns where their username appears
-            username = get_username_by_id(user_id)
-            cursor.execute("""
-                SELECT * FROM mis_data 
-                WHERE campaign_tag = ? AND username = ?
-                ORDER BY upload_date DESC
-            """, (campaign_tag, username))
+        # Users only see campaigns where they are the DSA
+        condition, params = _mis_scope(user_id, role, team_leader_id)
+        cursor.execute(f"""
+            SELECT * FROM mis_data md
+            WHERE md.campaign_tag = ? AND {condition}
+            ORDER BY md.upload_date DESC
+        """, [campaign_tag] + params)
         
         return cursor.fetchall()
         
@@ -0,0 +1,108 @@
+"""Keyset pagination and sparse fieldsets for list endpoints.
+
+Pages are ordered by (timestamp DESC, id DESC). The cursor handed to the
+client is the sort key of the last row it received, so fetching the next
+page is an index range search instead of an OFFSET scan.
+"""
+import base64
+import json
+from flask import request, jsonify
+from config import Config
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class InvalidFields(ValueError):
+    """Raised when a fields projection names unknown columns"""
+
+
+def encode_cursor(values):
+    """Encode a row's sort key as an opaque URL-safe cursor"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size=2):
+    """Decode a cursor back into a sort key tuple"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid pagination cursor")
+    return tuple(values)
+
+
+def get_page_args():
+    """Read limit and cursor from the query string.
+
+    Returns (limit, after) where after is the decoded sort key or None.
+    """
+    limit = request.args.get('limit', Config.ITEMS_PER_PAGE, type=int)
+    limit = max(1, min(limit, Config.MAX_ITEMS_PER_PAGE))
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    return limit, after
+
+
+def get_fields_arg():
+    """Read the comma-separated fields parameter; None selects every column"""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+
+def validate_fields(fields, columns):
+    """Raise InvalidFields unless every field is one of columns"""
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+
+
+def project_fields(fields, table_alias, columns, computed=None, required=('id',)):
+    """Build a validated SELECT list for a sparse fieldset.
+
+    fields is checked against the table's columns and the computed
+    {name: expression} columns; required columns (the sort key) are always
+    selected. Returns (select_list, selected_computed_names).
+    """
+    computed = computed or {}
+    validate_fields(fields, list(columns) + list(computed))
+
+    selected = list(dict.fromkeys(list(required) + list(fields)))
+    select_list = ', '.join(
+        f"{computed[field]} AS {field}" if field in computed else f"{table_alias}.{field}"
+        for field in selected
+    )
+    return select_list, [field for field in selected if field in computed]
+
+
+def keyset_clause(date_column, id_column, after):
+    """SQL condition and params selecting rows after a sort key"""
+    if after is None:
+        return '', []
+    return f" AND ({date_column}, {id_column}) < (?, ?)", list(after)
+
+
+def page_response(key, rows, limit, total, date_column, id_column='id'):
+    """Build the JSON response for one page.
+
+    rows holds up to limit + 1 rows; the extra row only signals that another
+    page exists. The total and next cursor are also sent as X-Total-Count
+    and X-Next-Cursor headers.
+    """
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor((last[date_column], last[id_column]))
+
+    response = jsonify({key: items, 'next_cursor': next_cursor, 'total': total})
+    response.headers['X-Total-Count'] = str(total)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -0,0 +1,167 @@
+"""Password hashing with a configurable work factor.
+
+Every new hash is bcrypt at Config.BCRYPT_ROUNDS. Older hashes - werkzeug's
+pbkdf2/scrypt format or bcrypt at another cost - still verify and are
+reported as needing a rehash so login can upgrade them.
+
+Hashing is CPU bound, so it runs on a bounded thread pool (bcrypt releases
+the GIL). When the pool is saturated, callers get HashingBusy instead of
+queueing behind other logins.
+"""
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+from werkzeug.security import check_password_hash
+from config import Config
+from backend.cache import TTLCache
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool can't take more work in time"""
+
+
+def hash_password(password, rounds=None):
+    """Hash a password with bcrypt at the configured cost"""
+    salt = bcrypt.gensalt(rounds=rounds or Config.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def needs_rehash(stored_hash):
+    """Check if a hash uses another scheme or cost than new hashes would"""
+    if not stored_hash.startswith(BCRYPT_PREFIXES):
+        return True
+    try:
+        rounds = int(stored_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != Config.BCRYPT_ROUNDS
+
+
+def check_password(stored_hash, password):
+    """Verify a password against a bcrypt or werkzeug hash"""
+    if isinstance(stored_hash, bytes):
+        stored_hash = stored_hash.decode('utf-8')
+    if stored_hash.startswith(BCRYPT_PREFIXES):
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+        except ValueError:
+            return False
+    return check_password_hash(stored_hash, password)
+
+
+class HashingPool:
+    """Bounded thread pool for password hashing and verification.
+
+    At most workers jobs run at once and at most queue_size more wait;
+    run() raises HashingBusy when no slot frees up within timeout.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, func, *args):
+        """Run func(*args) on the pool and return its result"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy("Too many concurrent logins, try again shortly")
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy("Password hashing timed out, try again shortly")
+
+
+class VerifiedHashCache:
+    """Remembers recent successful verifications so repeat logins skip bcrypt.
+
+    Entries hold an HMAC of the password under a per-process random key,
+    bound to the stored hash, so a password change or rehash invalidates
+    them. A ttl of 0 disables the fast path.
+    """
+
+    def __init__(self, ttl, max_size=4096):
+        self.enabled = ttl > 0
+        self._key = os.urandom(32)
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    def _digest(self, stored_hash, password):
+        """Keyed digest of a password for one stored hash"""
+        message = f"{stored_hash}\0{password}".encode('utf-8')
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def check(self, user_id, stored_hash, password):
+        """Return True if this password was recently verified for this hash"""
+        if not self.enabled:
+            return False
+        digest = self._cache.get(user_id)
+        return digest is not None and hmac.compare_digest(digest, self._digest(stored_hash, password))
+
+    def remember(self, user_id, stored_hash, password):
+        """Record a successful verification"""
+        if self.enabled:
+            self._cache.set(user_id, self._digest(stored_hash, password))
+
+    def forget(self, user_id):
+        """Drop a user's entry"""
+        self._cache.invalidate(user_id)
+
+
+_pool = None
+_verified = None
+_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Return the process-wide hashing pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    Config.PASSWORD_HASH_WORKERS,
+                    Config.PASSWORD_HASH_QUEUE,
+                    Config.PASSWORD_HASH_TIMEOUT
+                )
+    return _pool
+
+
+def get_verified_cache():
+    """Return the process-wide verified-hash cache"""
+    global _verified
+    if _verified is None:
+        with _lock:
+            if _verified is None:
+                _verified = VerifiedHashCache(Config.PASSWORD_VERIFY_CACHE_TTL)
+    return _verified
+
+
+def verify_and_upgrade(user_id, stored_hash, password):
+    """Verify a login password, upgrading an outdated hash.
+
+    Returns (ok, new_hash); new_hash is set when the stored hash should be
+    replaced with one at the current parameters.
+    """
+    verified = get_verified_cache()
+    if verified.check(user_id, stored_hash, password):
+        return True, None
+
+    pool = get_hashing_pool()
+    if not pool.run(check_password, stored_hash, password):
+        return False, None
+
+    new_hash = None
+    if needs_rehash(stored_hash):
+        new_hash = pool.run(hash_password, password)
+    verified.remember(user_id, new_hash or stored_hash, password)
+    return True, new_hash
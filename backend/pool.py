@@ -0,0 +1,196 @@
+import sqlite3
+import threading
+import queue
+import time
+from contextlib import contextmanager
+
+
+# Pragmas a storage profile may set, in the order they are applied
+STORAGE_PRAGMAS = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() hands it back to its pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.holds = 0
+
+    def close(self):
+        """Release the connection to the pool instead of closing it"""
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def dispose(self):
+        """Really close the underlying SQLite connection"""
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of SQLite connections.
+
+    A thread that already holds a connection gets the same one back from
+    acquire(), so nested helper calls share a connection; it only returns to
+    the pool once every holder has called close().
+    """
+
+    def __init__(self, database, max_size=5, timeout=30.0, pragmas=None):
+        self.database = database
+        self.pragmas = dict(pragmas or {})
+        unknown = set(self.pragmas) - set(STORAGE_PRAGMAS)
+        if unknown:
+            raise ValueError(f"Unsupported SQLite pragmas: {sorted(unknown)}")
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._created = 0
+        self._in_use = 0
+        self._metrics = {
+            'acquired': 0,
+            'reused': 0,
+            'waited': 0,
+            'timeouts': 0,
+            'wait_time': 0.0,
+        }
+
+    def _connect(self):
+        """Open a new pooled connection"""
+        conn = sqlite3.connect(
+            self.database,
+            factory=PooledConnection,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn)
+        conn.pool = self
+        return conn
+
+    def _apply_pragmas(self, conn):
+        """Apply the storage profile to a new connection"""
+        for name in STORAGE_PRAGMAS:
+            if name in self.pragmas:
+                value = self.pragmas[name]
+                if isinstance(value, str) and not value.isalnum():
+                    raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+                conn.execute(f"PRAGMA {name} = {value}")
+
+    def storage_profile(self):
+        """Return the pragma values SQLite actually reports"""
+        with self.connection() as conn:
+            return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in STORAGE_PRAGMAS}
+
+    def _checkout(self):
+        """Take an idle connection, open a new one or wait for a release"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._metrics['timeouts'] += 1
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+        with self._lock:
+            self._metrics['waited'] += 1
+            self._metrics['wait_time'] += time.perf_counter() - started
+        return conn
+
+    def acquire(self):
+        """Get a connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.holds += 1
+            with self._lock:
+                self._metrics['reused'] += 1
+            return conn
+
+        conn = self._checkout()
+        conn.holds = 1
+        self._local.conn = conn
+        with self._lock:
+            self._in_use += 1
+            self._metrics['acquired'] += 1
+        return conn
+
+    def release(self, conn):
+        """Drop one hold on a connection, returning it to the pool when unused"""
+        if conn.holds <= 0:
+            return
+        conn.holds -= 1
+        if conn.holds > 0:
+            return
+
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.conn = None
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection - replace it rather than pooling it
+            with self._lock:
+                self._in_use -= 1
+                self._created -= 1
+            conn.dispose()
+            return
+
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            conn.dispose()
+
+    def stats(self):
+        """Return pool metrics"""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats.update({
+                'max_size': self.max_size,
+                'created': self._created,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+            })
+        stats['wait_time'] = round(stats['wait_time'], 4)
+        return stats
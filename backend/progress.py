@@ -1,4 +1,7 @@
-from backend.db import get_db_connection
+from backend.db import get_db_connection, get_table_columns, bump_table_versions
+from backend.pagination import InvalidFields, keyset_clause, project_fields, validate_fields
+from backend.result_cache import cached_analytics
+from backend.scope import resolve_scope
 from datetime import datetime, timedelta
 import json
 
@@ -8,10 +11,16 @@ def create_lead(user_id, campaign_tag, customer_name=None, customer_phone=None,
     cursor = conn.cursor()
     
     try:
+        # Ownership is queried through indexed user IDs: the creator's and the effective owner's
+        cursor.execute("SELECT id FROM users WHERE username = ?", (created_by,))
+        creator = cursor.fetchone()
+        created_by_id = creator['id'] if creator else None
+        
         cursor.execute("""
             INSERT INTO leads 
-            (customer_name, phone_number, email, card_type, application_date, status, assigned_to, created_by, campaign_tag, bank)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (customer_name, phone_number, email, card_type, application_date, status, assigned_to, created_by,
+             created_by_id, owner_user_id, campaign_tag, bank)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             customer_name,
             customer_phone,
@@ -21,11 +30,14 @@ def create_lead(user_id, campaign_tag, customer_name=None, customer_phone=None,
             'new',
             user_id,
             created_by,
+            created_by_id,
+            user_id if user_id is not None else created_by_id,
             campaign_tag,
             bank_name
         ))
         
         lead_id = cursor.lastrowid
+        bump_table_versions(cursor, 'leads')
         conn.commit()
         
         return True, {"lead_id": lead_id, "message": "Lead created successfully"}
@@ -45,7 +57,7 @@ def update_lead_progress(lead_id, user_id, progress_status, progress_notes=None)
     try:
         # Check if user has access to this lead
         cursor.execute("""
-            SELECT created_by, assigned_to FROM leads WHERE id = ?
+            SELECT created_by_id, owner_user_id FROM leads WHERE id = ?
         """, (lead_id,))
         
         lead = cursor.fetchone()
@@ -53,7 +65,7 @@ def update_lead_progress(lead_id, user_id, progress_status, progress_notes=None)
             return False, "Lead not found"
         
         # Check access permissions
-        if lead['created_by'] != get_username_by_id(user_id) and lead['assigned_to'] != user_id:
+        if user_id not in (lead['created_by_id'], lead['owner_user_id']):
             return False, "Access denied to this lead"
         
         # Update lead status
@@ -73,6 +85,7 @@ def update_lead_progress(lead_id, user_id, progress_status, progress_notes=None)
             VALUES (?, ?, ?)
         """, (user_id, datetime.now().date(), progress_notes))
         
+        bump_table_versions(cursor, 'leads')
         conn.commit()
         return True, "Progress updated successfully"
         
@@ -98,51 +111,73 @@ def get_username_by_id(user_id):
     finally:
         conn.close()
 
-def get_user_leads(user_id, role, team_leader_id=None, status_filter=None, team_member=None):
-    """Get leads based on user role hierarchy"""
+def _lead_filters(user_id, role, team_leader_id=None, status_filter=None, team_member=None, campaign_tag=None):
+    """WHERE conditions and params limiting leads (aliased l) to a role's rows"""
+    where = "1=1"
+    params = []
+    
+    # Add role-based filtering
+    if role == 'team_leader' and team_member and team_member != 'All Team Members':
+        # Filter by specific team member
+        where += (" AND (l.owner_user_id = (SELECT id FROM users WHERE username = ?)"
+                  " OR l.created_by_id = (SELECT id FROM users WHERE username = ?))")
+        params.extend([team_member, team_member])
+    else:
+        # Admin sees every lead, a team leader their team's and their own, a user their own
+        condition, scope_params = resolve_scope(user_id, role, team_leader_id).lead_condition()
+        where += f" AND {condition}"
+        params.extend(scope_params)
+    
+    # Add status filter if provided
+    if status_filter:
+        where += " AND l.status = ?"
+        params.append(status_filter)
+    
+    if campaign_tag:
+        where += " AND l.campaign_tag = ?"
+        params.append(campaign_tag)
+    
+    return where, params
+
+# Computed lead fields that may be requested alongside leads columns
+LEAD_COMPUTED_FIELDS = {'assigned_username': 'u.username'}
+
+def get_user_leads(user_id, role, team_leader_id=None, status_filter=None, team_member=None,
+                   limit=None, after=None, fields=None, campaign_tag=None):
+    """Get leads based on user role hierarchy, newest first.
+
+    With limit, returns at most limit leads following the (created_at, id)
+    sort key after - see backend.pagination. fields restricts the columns
+    read; id and created_at are always included.
+    """
+    if fields is None:
+        select_list, join_users = "l.*, u.username as assigned_username", True
+    else:
+        select_list, computed = project_fields(
+            fields, 'l', get_table_columns('leads'), LEAD_COMPUTED_FIELDS,
+            required=('id', 'created_at')
+        )
+        join_users = bool(computed)
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Build the base query
-        base_query = """
-            SELECT 
-                l.*,
-                u.username as assigned_username
+        where, params = _lead_filters(user_id, role, team_leader_id, status_filter, team_member, campaign_tag)
+        keyset, keyset_params = keyset_clause('l.created_at', 'l.id', after)
+        join = "LEFT JOIN users u ON l.assigned_to = u.id" if join_users else ""
+        query = f"""
+            SELECT {select_list}
             FROM leads l
-            LEFT JOIN users u ON l.assigned_to = u.id
-            WHERE 1=1
+            {join}
+            WHERE {where}{keyset}
+            ORDER BY l.created_at DESC, l.id DESC
         """
-        params = []
-        
-        # Add role-based filtering
-        if role == 'admin':
-            # Admin can see all leads
-            pass
-        elif role == 'team_leader':
-            # Team leader can see team members' leads
-            if team_member and team_member != 'All Team Members':
-                # Filter by specific team member
-                base_query += " AND (l.created_by = ? OR l.assigned_to = (SELECT id FROM users WHERE username = ?))"
-                params.extend([team_member, team_member])
-            else:
-                # Show all team members' leads
-                base_query += " AND (l.created_by IN (SELECT username FROM users WHERE team_leader_id = ?) OR l.assigned_to IN (SELECT id FROM users WHERE team_leader_id = ?) OR l.created_by = ? OR l.assigned_to = ?)"
-                params.extend([team_leader_id, team_leader_id, get_username_by_id(user_id), user_id])
-        else:
-            # User can only see their own leads
-            base_query += " AND (l.created_by = ? OR l.assigned_to = ?)"
-            params.extend([get_username_by_id(user_id), user_id])
-        
-        # Add status filter if provided
-        if status_filter:
-            base_query += " AND l.status = ?"
-            params.append(status_filter)
-        
-        # Add ordering
-        base_query += " ORDER BY l.created_at DESC"
-        
-        cursor.execute(base_query, params)
+        params = params + keyset_params
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        cursor.execute(query, params)
         leads = cursor.fetchall()
         return [dict(lead) for lead in leads]
         
@@ -152,6 +187,71 @@ def get_user_leads(user_id, role, team_leader_id=None, status_filter=None, team_
     finally:
         conn.close()
 
+def count_user_leads(user_id, role, team_leader_id=None, status_filter=None, team_member=None, campaign_tag=None):
+    """Count the leads a role can see"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        where, params = _lead_filters(user_id, role, team_leader_id, status_filter, team_member, campaign_tag)
+        cursor.execute(f"SELECT COUNT(*) AS total FROM leads l WHERE {where}", params)
+        return cursor.fetchone()['total']
+    except Exception as e:
+        print(f"Error counting user leads: {e}")
+        return 0
+    finally:
+        conn.close()
+
+# Computed lead columns that may be grouped on alongside leads columns
+LEAD_AGGREGATE_COMPUTED = {'created_date': 'date(l.created_at)'}
+
+def aggregate_leads(user_id, role, team_leader_id=None, group_by=None, filters=None, top=None, team_member=None):
+    """Count a role's leads grouped by leads columns, largest groups first.
+
+    Works like mis.aggregate_mis_data; created_date groups by creation day.
+    Unknown columns raise backend.pagination.InvalidFields. Returns a list
+    of dicts holding the group_by columns and count.
+    """
+    group_by = list(group_by or [])
+    filters = dict(filters or {})
+    if not group_by:
+        raise InvalidFields("At least one group_by column is required")
+    columns = list(get_table_columns('leads')) + list(LEAD_AGGREGATE_COMPUTED)
+    validate_fields(group_by + list(filters), columns)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        where, params = _lead_filters(user_id, role, team_leader_id, team_member=team_member)
+        for column, value in filters.items():
+            where += f" AND {LEAD_AGGREGATE_COMPUTED.get(column, f'l.{column}')} = ?"
+            params.append(value)
+        select_list = ', '.join(
+            f"{LEAD_AGGREGATE_COMPUTED[column]} AS {column}" if column in LEAD_AGGREGATE_COMPUTED
+            else f"l.{column}"
+            for column in group_by
+        )
+        query = f"""
+            SELECT {select_list}, COUNT(*) AS count
+            FROM leads l
+            WHERE {where}
+            GROUP BY {', '.join(str(position) for position in range(1, len(group_by) + 1))}
+            ORDER BY count DESC
+        """
+        if top is not None:
+            query += " LIMIT ?"
+            params.append(top)
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+        
+    except Exception as e:
+        print(f"Error aggregating leads: {e}")
+        return []
+    finally:
+        conn.close()
+
 def get_user_id_by_username(username):
     """Get user ID by username"""
     conn = get_db_connection()
@@ -174,37 +274,15 @@ def get_lead_details(lead_id, user_id, role, team_leader_id=None):
     
     try:
         # Build query with role-based access
-        if role == 'admin':
-            cursor.execute("""
-                SELECT 
-                    l.*,
-                    u.username as assigned_username
-                FROM leads l
-                LEFT JOIN users u ON l.assigned_to = u.id
-                WHERE l.id = ?
-            """, (lead_id,))
-        elif role == 'team_leader':
-            cursor.execute("""
-                SELECT 
-                    l.*,
-                    u.username as assigned_username
-                FROM leads l
-                LEFT JOIN users u ON l.assigned_to = u.id
-                WHERE l.id = ? AND (
-                    l.created_by IN (SELECT username FROM users WHERE team_leader_id = ?) OR
-                    l.assigned_to IN (SELECT id FROM users WHERE team_leader_id = ?) OR
-                    l.created_by = ? OR l.assigned_to = ?
-                )
-            """, (lead_id, team_leader_id, team_leader_id, get_username_by_id(user_id), user_id))
-        else:
-            cursor.execute("""
-                SELECT 
-                    l.*,
-                    u.username as assigned_username
-                FROM leads l
-                LEFT JOIN users u ON l.assigned_to = u.id
-                WHERE l.id = ? AND (l.created_by = ? OR l.assigned_to = ?)
-            """, (lead_id, get_username_by_id(user_id), user_id))
+        condition, params = resolve_scope(user_id, role, team_leader_id).lead_condition()
+        cursor.execute(f"""
+            SELECT 
+                l.*,
+                u.username as assigned_username
+            FROM leads l
+            LEFT JOIN users u ON l.assigned_to = u.id
+            WHERE l.id = ? AND {condition}
+        """, [lead_id] + params)
         
         lead = cursor.fetchone()
         return dict(lead) if lead else None
@@ -251,6 +329,7 @@ def get_team_member_ids(team_leader_id):
     finally:
         conn.close()
 
+@cached_analytics('leads', 'users')
 def get_progress_statistics(user_id, role, team_leader_id=None, days=30):
     """Get progress statistics based on role hierarchy"""
     conn = get_db_connection()
@@ -259,48 +338,18 @@ def get_progress_statistics(user_id, role, team_leader_id=None, days=30):
     try:
         start_date = datetime.now().date() - timedelta(days=days)
         
-        if role == 'admin':
-            # Admin can see all statistics
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_leads,
-                    SUM(CASE WHEN status = 'new' THEN 1 ELSE 0 END) as new_leads,
-                    SUM(CASE WHEN status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads,
-                    SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
-                    SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected_leads
-                FROM leads
-                WHERE created_at >= ?
-            """, (start_date,))
-            
-        elif role == 'team_leader':
-            # Team leader can see team statistics
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_leads,
-                    SUM(CASE WHEN status = 'new' THEN 1 ELSE 0 END) as new_leads,
-                    SUM(CASE WHEN status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads,
-                    SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
-                    SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected_leads
-                FROM leads
-                WHERE created_at >= ? AND (
-                    created_by IN (SELECT username FROM users WHERE team_leader_id = ?) OR
-                    assigned_to IN (SELECT id FROM users WHERE team_leader_id = ?) OR
-                    created_by = ? OR assigned_to = ?
-                )
-            """, (start_date, team_leader_id, team_leader_id, get_username_by_id(user_id), user_id))
-            
-        else:
-            # User can only see their own statistics
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_leads,
-                    SUM(CASE WHEN status = 'new' THEN 1 ELSE 0 END) as new_leads,
-                    SUM(CASE WHEN status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads,
-                    SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
-                    SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected_leads
-                FROM leads
-                WHERE created_at >= ? AND (created_by = ? OR assigned_to = ?)
-            """, (start_date, get_username_by_id(user_id), user_id))
+        # Admin sees all statistics, a team leader their team's, a user their own
+        condition, params = resolve_scope(user_id, role, team_leader_id).lead_condition(alias='leads')
+        cursor.execute(f"""
+            SELECT 
+                COUNT(*) as total_leads,
+                SUM(CASE WHEN status = 'new' THEN 1 ELSE 0 END) as new_leads,
+                SUM(CASE WHEN status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads,
+                SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
+                SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected_leads
+            FROM leads
+            WHERE created_at >= ? AND {condition}
+        """, [start_date] + params)
         
         stats = cursor.fetchone()
         return dict(stats) if stats else {}
@@ -317,39 +366,15 @@ def get_campaign_progress(campaign_tag, user_id, role, team_leader_id=None):
     cursor = conn.cursor()
     
     try:
-        if role == 'admin':
-            cursor.execute("""
-                SELECT 
-                    status,
-                    COUNT(*) as count
-                FROM leads
-                WHERE campaign_tag = ?
-                GROUP BY status
-            """, (campaign_tag,))
-            
-        elif role == 'team_leader':
-            cursor.execute("""
-                SELECT 
-                    status,
-                    COUNT(*) as count
-                FROM leads
-                WHERE campaign_tag = ? AND (
-                    created_by IN (SELECT username FROM users WHERE team_leader_id = ?) OR
-                    assigned_to IN (SELECT id FROM users WHERE team_leader_id = ?) OR
-                    created_by = ? OR assigned_to = ?
-                )
-                GROUP BY status
-            """, (campaign_tag, team_leader_id, team_leader_id, get_username_by_id(user_id), user_id))
-            
-        else:
-            cursor.execute("""
-                SELECT 
-                    status,
-                    COUNT(*) as count
-                FROM leads
-                WHERE campaign_tag = ? AND (created_by = ? OR assigned_to = ?)
-                GROUP BY status
-            """, (campaign_tag, get_username_by_id(user_id), user_id))
+        condition, params = resolve_scope(user_id, role, team_leader_id).lead_condition(alias='leads')
+        cursor.execute(f"""
+            SELECT 
+                status,
+                COUNT(*) as count
+            FROM leads
+            WHERE campaign_tag = ? AND {condition}
+            GROUP BY status
+        """, [campaign_tag] + params)
         
         progress = cursor.fetchall()
         return [dict(row) for row in progress]
@@ -360,6 +385,27 @@ def get_campaign_progress(campaign_tag, user_id, role, team_leader_id=None):
     finally:
         conn.close()
 
+def _owned_leads_cte(users):
+    """CTE owned_leads(user_id, status, created_at) of the leads in the window per user of a users CTE.
+
+    A lead belongs to its effective owner and, when someone else created
+    it, to its creator too. Both branches are equality joins on the
+    (owner_user_id, created_at) and (created_by_id, created_at) indexes.
+    Takes the window start twice as params.
+    """
+    return f"""owned_leads AS (
+                SELECT t.id as user_id, l.status, l.created_at
+                FROM {users} t
+                JOIN leads l ON l.owner_user_id = t.id
+                WHERE l.created_at >= ?
+                UNION ALL
+                SELECT t.id, l.status, l.created_at
+                FROM {users} t
+                JOIN leads l ON l.created_by_id = t.id
+                WHERE l.created_at >= ? AND l.owner_user_id IS NOT l.created_by_id
+            )"""
+
+@cached_analytics('leads', 'users')
 def get_user_performance(user_id, role, team_leader_id=None, days=30):
     """Get user performance data based on role hierarchy"""
     conn = get_db_connection()
@@ -368,49 +414,23 @@ def get_user_performance(user_id, role, team_leader_id=None, days=30):
     try:
         start_date = datetime.now().date() - timedelta(days=days)
         
-        if role == 'admin':
-            # Admin can see all users' performance
-            cursor.execute("""
-                SELECT 
-                    u.username,
-                    COUNT(l.id) as total_leads,
-                    SUM(CASE WHEN l.status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
-                    SUM(CASE WHEN l.status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads
-                FROM users u
-                LEFT JOIN leads l ON u.username = l.created_by OR u.id = l.assigned_to
-                WHERE l.created_at >= ? OR l.created_at IS NULL
-                GROUP BY u.id, u.username
-                ORDER BY total_leads DESC
-            """, (start_date,))
-            
-        elif role == 'team_leader':
-            # Team leader can see team members' performance
-            cursor.execute("""
-                SELECT 
-                    u.username,
-                    COUNT(l.id) as total_leads,
-                    SUM(CASE WHEN l.status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
-                    SUM(CASE WHEN l.status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads
-                FROM users u
-                LEFT JOIN leads l ON u.username = l.created_by OR u.id = l.assigned_to
-                WHERE (u.team_leader_id = ? OR u.id = ?) AND (l.created_at >= ? OR l.created_at IS NULL)
-                GROUP BY u.id, u.username
-                ORDER BY total_leads DESC
-            """, (team_leader_id, user_id, start_date))
-            
-        else:
-            # User can only see their own performance
-            cursor.execute("""
-                SELECT 
-                    u.username,
-                    COUNT(l.id) as total_leads,
-                    SUM(CASE WHEN l.status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
-                    SUM(CASE WHEN l.status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads
-                FROM users u
-                LEFT JOIN leads l ON u.username = l.created_by OR u.id = l.assigned_to
-                WHERE u.id = ? AND (l.created_at >= ? OR l.created_at IS NULL)
-                GROUP BY u.id, u.username
-            """, (user_id, start_date))
+        # Admin sees every user, a team leader their team and themselves, a user themselves
+        condition, params = resolve_scope(user_id, role, team_leader_id).owner_condition('u', 'id')
+        cursor.execute(f"""
+            WITH scoped AS (
+                SELECT u.id, u.username FROM users u WHERE {condition}
+            ),
+            {_owned_leads_cte('scoped')}
+            SELECT 
+                t.username,
+                COUNT(owned_leads.user_id) as total_leads,
+                SUM(CASE WHEN owned_leads.status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
+                SUM(CASE WHEN owned_leads.status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads
+            FROM scoped t
+            LEFT JOIN owned_leads ON owned_leads.user_id = t.id
+            GROUP BY t.id, t.username
+            ORDER BY total_leads DESC
+        """, params + [start_date, start_date])
         
         performance = cursor.fetchall()
         return [dict(row) for row in performance]
@@ -421,74 +441,35 @@ def get_user_performance(user_id, role, team_leader_id=None, days=30):
     finally:
         conn.close()
 
+def _rollup_scope(user_id, role, team_leader_id=None):
+    """WHERE condition and params limiting mis_daily_rollup (aliased r) to a role's MIS rows"""
+    return resolve_scope(user_id, role, team_leader_id).owner_condition('r', 'dsa_user_id', 'uploaded_by')
+
+@cached_analytics('mis_data', 'users')
 def get_mis_analytics(user_id, role, team_leader_id=None, days=30):
-    """Get comprehensive MIS analytics with specific fields"""
+    """Get comprehensive MIS analytics with specific fields, from the daily rollup"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
         start_date = datetime.now().date() - timedelta(days=days)
+        scope, params = _rollup_scope(user_id, role, team_leader_id)
         
-        if role == 'admin':
-            # Admin sees all MIS data
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_records,
-                    SUM(CASE WHEN application_status = 'APPROVED' THEN 1 ELSE 0 END) as approved_applications,
-                    SUM(CASE WHEN application_status = 'PENDING' THEN 1 ELSE 0 END) as pending_applications,
-                    SUM(CASE WHEN application_status = 'REJECTED' THEN 1 ELSE 0 END) as rejected_applications,
-                    AVG(CAST(attempt AS INTEGER)) as avg_attempts,
-                    SUM(CASE WHEN card_type LIKE '%VISA%' OR card_type LIKE '%PLATINUM%' THEN 1 ELSE 0 END) as visa_platinum,
-                    SUM(CASE WHEN card_type LIKE '%MASTERCARD%' THEN 1 ELSE 0 END) as mastercard,
-                    COUNT(DISTINCT form_campaign_id) as unique_campaigns,
-                    COUNT(DISTINCT customer_dropped_page) as unique_drop_pages,
-                    COUNT(DISTINCT lead_generation_stage) as unique_stages
-                FROM mis_data
-                WHERE upload_date >= ?
-            """, (start_date,))
-            
-        elif role == 'team_leader':
-            # Team leader sees team members' MIS data
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_records,
-                    SUM(CASE WHEN application_status = 'APPROVED' THEN 1 ELSE 0 END) as approved_applications,
-                    SUM(CASE WHEN application_status = 'PENDING' THEN 1 ELSE 0 END) as pending_applications,
-                    SUM(CASE WHEN application_status = 'REJECTED' THEN 1 ELSE 0 END) as rejected_applications,
-                    AVG(CAST(attempt AS INTEGER)) as avg_attempts,
-                    SUM(CASE WHEN card_type LIKE '%VISA%' OR card_type LIKE '%PLATINUM%' THEN 1 ELSE 0 END) as visa_platinum,
-                    SUM(CASE WHEN card_type LIKE '%MASTERCARD%' THEN 1 ELSE 0 END) as mastercard,
-                    COUNT(DISTINCT form_campaign_id) as unique_campaigns,
-                    COUNT(DISTINCT customer_dropped_page) as unique_drop_pages,
-                    COUNT(DISTINCT lead_generation_stage) as unique_stages
-                FROM mis_data
-                WHERE upload_date >= ? AND (
-                    username IN (SELECT username FROM users WHERE team_leader_id = ?) OR
-                    uploaded_by IN (SELECT id FROM users WHERE team_leader_id = ?) OR
-                    uploaded_by = ? OR username = ?
-                )
-            """, (start_date, team_leader_id, team_leader_id, user_id, get_username_by_id(user_id)))
-            
-        else:
-            # User sees only their own MIS data
-            username = get_username_by_id(user_id)
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_records,
-                    SUM(CASE WHEN application_status = 'APPROVED' THEN 1 ELSE 0 END) as approved_applications,
-                    SUM(CASE WHEN application_status = 'PENDING' THEN 1 ELSE 0 END) as pending_applications,
-                    SUM(CASE WHEN application_status = 'REJECTED' THEN 1 ELSE 0 END) as rejected_applications,
-                    AVG(CAST(attempt AS INTEGER)) as avg_attempts,
-                    SUM(CASE WHEN card_type LIKE '%VISA%' OR card_type LIKE '%PLATINUM%' THEN 1 ELSE 0 END) as visa_platinum,
-                    SUM(CASE WHEN card_type LIKE '%MASTERCARD%' THEN 1 ELSE 0 END) as mastercard,
-                    COUNT(DISTINCT form_campaign_id) as unique_campaigns,
-                    COUNT(DISTINCT customer_dropped_page) as unique_drop_pages,
-                    COUNT(DISTINCT lead_generation_stage) as unique_stages
-                FROM mis_data
-                WHERE upload_date >= ? AND (
-                    form_campaign_id LIKE ? OR uploaded_by = ?
-                )
-            """, (start_date, f'%{username}%', user_id))
+        cursor.execute(f"""
+            SELECT 
+                COALESCE(SUM(r.record_count), 0) as total_records,
+                SUM(CASE WHEN r.application_status = 'APPROVED' THEN r.record_count ELSE 0 END) as approved_applications,
+                SUM(CASE WHEN r.application_status = 'PENDING' THEN r.record_count ELSE 0 END) as pending_applications,
+                SUM(CASE WHEN r.application_status = 'REJECTED' THEN r.record_count ELSE 0 END) as rejected_applications,
+                CAST(SUM(r.attempt_sum) AS REAL) / NULLIF(SUM(r.attempt_count), 0) as avg_attempts,
+                SUM(CASE WHEN r.card_type LIKE '%VISA%' OR r.card_type LIKE '%PLATINUM%' THEN r.record_count ELSE 0 END) as visa_platinum,
+                SUM(CASE WHEN r.card_type LIKE '%MASTERCARD%' THEN r.record_count ELSE 0 END) as mastercard,
+                COUNT(DISTINCT r.form_campaign_id) as unique_campaigns,
+                COUNT(DISTINCT r.customer_dropped_page) as unique_drop_pages,
+                COUNT(DISTINCT r.lead_generation_stage) as unique_stages
+            FROM mis_daily_rollup r
+            WHERE r.day >= ? AND {scope}
+        """, [start_date.isoformat()] + params)
         
         analytics = cursor.fetchone()
         return dict(analytics) if analytics else {}
@@ -499,6 +480,7 @@ def get_mis_analytics(user_id, role, team_leader_id=None, days=30):
     finally:
         conn.close()
 
+@cached_analytics('login_logs', 'users')
 def get_user_login_stats(user_id, role, team_leader_id=None, days=30):
     """Get user login statistics including location and time"""
     conn = get_db_connection()
@@ -507,56 +489,22 @@ def get_user_login_stats(user_id, role, team_leader_id=None, days=30):
     try:
         start_date = datetime.now().date() - timedelta(days=days)
         
-        if role == 'admin':
-            # Admin sees all users' login stats
-            cursor.execute("""
-                SELECT 
-                    u.username,
-                    COUNT(ll.id) as total_logins,
-                    MAX(ll.login_time) as last_login,
-                    ll.location,
-                    ll.ip_address,
-                    ll.user_agent
-                FROM users u
-                LEFT JOIN login_logs ll ON u.id = ll.user_id
-                WHERE ll.login_time >= ? OR ll.login_time IS NULL
-                GROUP BY u.id, u.username, ll.location, ll.ip_address, ll.user_agent
-                ORDER BY last_login DESC
-            """, (start_date,))
-            
-        elif role == 'team_leader':
-            # Team leader sees team members' login stats
-            cursor.execute("""
-                SELECT 
-                    u.username,
-                    COUNT(ll.id) as total_logins,
-                    MAX(ll.login_time) as last_login,
-                    ll.location,
-                    ll.ip_address,
-                    ll.user_agent
-                FROM users u
-                LEFT JOIN login_logs ll ON u.id = ll.user_id
-                WHERE (u.team_leader_id = ? OR u.id = ?) AND (ll.login_time >= ? OR ll.login_time IS NULL)
-                GROUP BY u.id, u.username, ll.location, ll.ip_address, ll.user_agent
-                ORDER BY last_login DESC
-            """, (team_leader_id, user_id, start_date))
-            
-        else:
-            # User sees only their own login stats
-            cursor.execute("""
-                SELECT 
-                    u.username,
-                    COUNT(ll.id) as total_logins,
-                    MAX(ll.login_time) as last_login,
-                    ll.location,
-                    ll.ip_address,
-                    ll.user_agent
-                FROM users u
-                LEFT JOIN login_logs ll ON u.id = ll.user_id
-                WHERE u.id = ? AND (ll.login_time >= ? OR ll.login_time IS NULL)
-                GROUP BY u.id, u.username, ll.location, ll.ip_address, ll.user_agent
-                ORDER BY last_login DESC
-            """, (user_id, start_date))
+        # Admin sees every user, a team leader their team and themselves, a user themselves
+        condition, params = resolve_scope(user_id, role, team_leader_id).owner_condition('u', 'id')
+        cursor.execute(f"""
+            SELECT 
+                u.username,
+                COUNT(ll.id) as total_logins,
+                MAX(ll.login_time) as last_login,
+                ll.location,
+                ll.ip_address,
+                ll.user_agent
+            FROM users u
+            LEFT JOIN login_logs ll ON u.id = ll.user_id
+            WHERE {condition} AND (ll.login_time >= ? OR ll.login_time IS NULL)
+            GROUP BY u.id, u.username, ll.location, ll.ip_address, ll.user_agent
+            ORDER BY last_login DESC
+        """, params + [start_date])
         
         login_stats = cursor.fetchall()
         return [dict(row) for row in login_stats]
@@ -567,74 +515,31 @@ def get_user_login_stats(user_id, role, team_leader_id=None, days=30):
     finally:
         conn.close()
 
+@cached_analytics('mis_data', 'users')
 def get_lead_analytics_by_status(user_id, role, team_leader_id=None, days=30):
-    """Get lead analytics grouped by application status and other key fields"""
+    """Get lead analytics grouped by application status and other key fields, from the daily rollup"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
         start_date = datetime.now().date() - timedelta(days=days)
+        scope, params = _rollup_scope(user_id, role, team_leader_id)
         
-        if role == 'admin':
-            # Admin sees all lead analytics
-            cursor.execute("""
-                SELECT 
-                    application_status,
-                    customer_dropped_page,
-                    lead_generation_stage,
-                    card_type,
-                    status,
-                    disposition,
-                    booking_status,
-                    COUNT(*) as count
-                FROM mis_data
-                WHERE upload_date >= ?
-                GROUP BY application_status, customer_dropped_page, lead_generation_stage, card_type, status, disposition, booking_status
-                ORDER BY count DESC
-            """, (start_date,))
-            
-        elif role == 'team_leader':
-            # Team leader sees team members' lead analytics
-            cursor.execute("""
-                SELECT 
-                    application_status,
-                    customer_dropped_page,
-                    lead_generation_stage,
-                    card_type,
-                    status,
-                    disposition,
-                    booking_status,
-                    COUNT(*) as count
-                FROM mis_data
-                WHERE upload_date >= ? AND (
-                    username IN (SELECT username FROM users WHERE team_leader_id = ?) OR
-                    uploaded_by IN (SELECT id FROM users WHERE team_leader_id = ?) OR
-                    uploaded_by = ? OR username = ?
-                )
-                GROUP BY application_status, customer_dropped_page, lead_generation_stage, card_type, status, disposition, booking_status
-                ORDER BY count DESC
-            """, (start_date, team_leader_id, team_leader_id, user_id, get_username_by_id(user_id)))
-            
-        else:
-            # User sees only their own lead analytics
-            username = get_username_by_id(user_id)
-            cursor.execute("""
-                SELECT 
-                    application_status,
-                    customer_dropped_page,
-                    lead_generation_stage,
-                    card_type,
-                    status,
-                    disposition,
-                    booking_status,
-                    COUNT(*) as count
-                FROM mis_data
-                WHERE upload_date >= ? AND (
-                    form_campaign_id LIKE ? OR uploaded_by = ?
-                )
-                GROUP BY application_status, customer_dropped_page, lead_generation_stage, card_type, status, disposition, booking_status
-                ORDER BY count DESC
-            """, (start_date, f'%{username}%', user_id))
+        cursor.execute(f"""
+            SELECT 
+                r.application_status,
+                r.customer_dropped_page,
+                r.lead_generation_stage,
+                r.card_type,
+                r.status,
+                r.disposition,
+                r.booking_status,
+                SUM(r.record_count) as count
+            FROM mis_daily_rollup r
+            WHERE r.day >= ? AND {scope}
+            GROUP BY r.application_status, r.customer_dropped_page, r.lead_generation_stage, r.card_type, r.status, r.disposition, r.booking_status
+            ORDER BY count DESC
+        """, [start_date.isoformat()] + params)
         
         analytics = cursor.fetchall()
         return [dict(row) for row in analytics]
@@ -646,42 +551,77 @@ def get_lead_analytics_by_status(user_id, role, team_leader_id=None, days=30):
         conn.close()
 
 def get_team_member_detailed_stats(team_leader_id, days=30):
-    """Get detailed statistics for each team member"""
+    """Get detailed statistics for each team member.
+
+    Leads, MIS records and logins are aggregated per member in separate
+    subqueries and joined one row per member, so the cost grows with each
+    table's matching rows instead of their product. MIS counts come from
+    the daily rollup.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
         start_date = datetime.now().date() - timedelta(days=days)
         
-        cursor.execute("""
-            SELECT 
-                u.username,
-                u.email,
-                u.role,
-                COUNT(DISTINCT l.id) as total_leads,
-                SUM(CASE WHEN l.status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
-                SUM(CASE WHEN l.status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads,
-                SUM(CASE WHEN l.status = 'new' THEN 1 ELSE 0 END) as new_leads,
-                COUNT(DISTINCT md.id) as total_mis_records,
-                SUM(CASE WHEN md.application_status = 'APPROVED' THEN 1 ELSE 0 END) as approved_applications,
-                SUM(CASE WHEN md.application_status = 'PENDING' THEN 1 ELSE 0 END) as pending_applications,
-                COUNT(DISTINCT ll.id) as total_logins,
-                MAX(ll.login_time) as last_login,
-                ll.location as last_location
-            FROM users u
-            LEFT JOIN leads l ON u.username = l.created_by OR u.id = l.assigned_to
-            LEFT JOIN mis_data md ON u.username = md.username OR u.id = md.uploaded_by
-            LEFT JOIN login_logs ll ON u.id = ll.user_id
-            WHERE u.team_leader_id = ? AND (
-                l.created_at >= ? OR l.created_at IS NULL
-            ) AND (
-                md.upload_date >= ? OR md.upload_date IS NULL
-            ) AND (
-                ll.login_time >= ? OR ll.login_time IS NULL
+        # last_location: SQLite takes a bare column from the row holding MAX(login_time)
+        cursor.execute(f"""
+            WITH team AS (
+                SELECT id, username, email, role FROM users WHERE team_leader_id = ?
+            ),
+            {_owned_leads_cte('team')},
+            lead_stats AS (
+                SELECT 
+                    user_id,
+                    COUNT(*) as total_leads,
+                    SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed_leads,
+                    SUM(CASE WHEN status = 'in-progress' THEN 1 ELSE 0 END) as in_progress_leads,
+                    SUM(CASE WHEN status = 'new' THEN 1 ELSE 0 END) as new_leads
+                FROM owned_leads
+                GROUP BY user_id
+            ),
+            mis_stats AS (
+                SELECT 
+                    t.id as user_id,
+                    SUM(r.record_count) as total_mis_records,
+                    SUM(CASE WHEN r.application_status = 'APPROVED' THEN r.record_count ELSE 0 END) as approved_applications,
+                    SUM(CASE WHEN r.application_status = 'PENDING' THEN r.record_count ELSE 0 END) as pending_applications
+                FROM team t
+                JOIN mis_daily_rollup r ON r.dsa_user_id = t.id OR r.uploaded_by = t.id
+                WHERE r.day >= ?
+                GROUP BY t.id
+            ),
+            login_stats AS (
+                SELECT 
+                    ll.user_id,
+                    COUNT(*) as total_logins,
+                    MAX(ll.login_time) as last_login,
+                    ll.location as last_location
+                FROM team t
+                JOIN login_logs ll ON ll.user_id = t.id
+                WHERE ll.login_time >= ?
+                GROUP BY ll.user_id
             )
-            GROUP BY u.id, u.username, u.email, u.role, ll.location
+            SELECT 
+                t.username,
+                t.email,
+                t.role,
+                COALESCE(ls.total_leads, 0) as total_leads,
+                COALESCE(ls.closed_leads, 0) as closed_leads,
+                COALESCE(ls.in_progress_leads, 0) as in_progress_leads,
+                COALESCE(ls.new_leads, 0) as new_leads,
+                COALESCE(ms.total_mis_records, 0) as total_mis_records,
+                COALESCE(ms.approved_applications, 0) as approved_applications,
+                COALESCE(ms.pending_applications, 0) as pending_applications,
+                COALESCE(lg.total_logins, 0) as total_logins,
+                lg.last_login,
+                lg.last_location
+            FROM team t
+            LEFT JOIN lead_stats ls ON ls.user_id = t.id
+            LEFT JOIN mis_stats ms ON ms.user_id = t.id
+            LEFT JOIN login_stats lg ON lg.user_id = t.id
             ORDER BY total_leads DESC, total_mis_records DESC
-        """, (team_leader_id, start_date, start_date, start_date))
+        """, (team_leader_id, start_date, start_date, start_date.isoformat(), start_date))
         
         stats = cursor.fetchall()
         return [dict(row) for row in stats]
@@ -0,0 +1,56 @@
+"""Memoized analytics results validated against table version counters.
+
+The progress analytics aggregate whole tables, but those tables change only
+when an MIS file is loaded, a lead is written or a login is recorded. Each
+write bumps its table's counter in table_versions (see
+db.bump_table_versions), so a cached result is served only while every
+table it read is unchanged - in this process or any other worker sharing
+the database. Checking costs one indexed read of table_versions.
+"""
+import copy
+import functools
+from datetime import datetime, timedelta
+from config import Config
+from backend.cache import TTLCache
+from backend.db import get_table_versions
+
+_results = TTLCache(max_size=Config.ANALYTICS_CACHE_SIZE, ttl=Config.ANALYTICS_CACHE_TTL)
+
+
+def cached_analytics(*tables):
+    """Cache an analytics function(user_id, role, team_leader_id=None, days=30).
+
+    Entries are keyed on the function, the caller's role scope and the first
+    day of the window, so the window still rolls over at midnight. Empty
+    results - also what the functions return on error - are not cached.
+    Callers always get their own copy, so annotating a result can't change
+    what other requests are served.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(user_id, role, team_leader_id=None, days=30):
+            start_date = datetime.now().date() - timedelta(days=days)
+            key = (func.__name__, user_id, role, team_leader_id, start_date.isoformat())
+            # Read before computing: a write racing the query leaves the entry stale, never wrong
+            versions = get_table_versions(tables)
+            
+            entry = _results.get(key)
+            if entry is not None and entry[0] == versions:
+                return copy.deepcopy(entry[1])
+            
+            result = func(user_id, role, team_leader_id, days)
+            if result:
+                _results.set(key, (versions, copy.deepcopy(result)))
+            return result
+        return wrapper
+    return decorator
+
+
+def get_analytics_cache_stats():
+    """Return analytics cache metrics"""
+    return _results.stats()
+
+
+def clear_analytics_cache():
+    """Drop every cached analytics result"""
+    _results.clear()
@@ -0,0 +1,77 @@
+"""Daily MIS rollup maintained alongside mis_data.
+
+mis_daily_rollup holds one row per upload day, owning DSA, uploader and
+combination of the dimensions the analytics group or filter on, with the
+record count and the attempt sum/count behind AVG(attempt). Writers keep
+it in step incrementally: before changing existing mis_data rows they
+remove those rows' contribution, afterwards they add the new state back,
+all inside the same transaction. The MIS analytics in progress.py read
+the rollup, so their cost depends on days x dimensions, not on rows.
+
+Missing owners are stored as 0 and missing dimension values as '' so the
+rollup key stays unique (SQLite treats NULLs in a UNIQUE key as distinct).
+"""
+
+# Grouping dimensions besides day, dsa_user_id and uploaded_by
+MIS_ROLLUP_DIMENSIONS = [
+    'application_status', 'card_type', 'lead_generation_stage', 'customer_dropped_page',
+    'booking_status', 'status', 'disposition', 'form_campaign_id'
+]
+
+_KEY_COLUMNS = ['day', 'dsa_user_id', 'uploaded_by'] + MIS_ROLLUP_DIMENSIONS
+
+
+def create_mis_rollup(cursor):
+    """Create the rollup table and the indexes its role-scoped reads use"""
+    dimensions = ',\n            '.join(f"{column} TEXT NOT NULL DEFAULT ''" for column in MIS_ROLLUP_DIMENSIONS)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS mis_daily_rollup (
+            day TEXT NOT NULL,
+            dsa_user_id INTEGER NOT NULL DEFAULT 0,
+            uploaded_by INTEGER NOT NULL DEFAULT 0,
+            {dimensions},
+            record_count INTEGER NOT NULL DEFAULT 0,
+            attempt_sum INTEGER NOT NULL DEFAULT 0,
+            attempt_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY ({', '.join(_KEY_COLUMNS)})
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mis_rollup_dsa_user_id ON mis_daily_rollup (dsa_user_id, day)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mis_rollup_uploaded_by ON mis_daily_rollup (uploaded_by, day)")
+
+
+def apply_mis_rollup(cursor, where, params=(), sign=1):
+    """Add (sign=1) or remove (sign=-1) the contribution of mis_data rows matching where"""
+    dimensions = ', '.join(f"COALESCE({column}, '')" for column in MIS_ROLLUP_DIMENSIONS)
+    cursor.execute(f"""
+        INSERT INTO mis_daily_rollup ({', '.join(_KEY_COLUMNS)}, record_count, attempt_sum, attempt_count)
+        SELECT
+            date(upload_date), COALESCE(dsa_user_id, 0), COALESCE(uploaded_by, 0), {dimensions},
+            {sign} * COUNT(*),
+            {sign} * COALESCE(SUM(CAST(attempt AS INTEGER)), 0),
+            {sign} * COUNT(CAST(attempt AS INTEGER))
+        FROM mis_data
+        WHERE {where}
+        GROUP BY {', '.join(str(position) for position in range(1, len(_KEY_COLUMNS) + 1))}
+        ON CONFLICT ({', '.join(_KEY_COLUMNS)}) DO UPDATE SET
+            record_count = record_count + excluded.record_count,
+            attempt_sum = attempt_sum + excluded.attempt_sum,
+            attempt_count = attempt_count + excluded.attempt_count
+    """, params)
+
+
+def prune_mis_rollup(cursor):
+    """Drop rollup rows whose records all moved elsewhere"""
+    cursor.execute("DELETE FROM mis_daily_rollup WHERE record_count = 0")
+
+
+def rebuild_mis_rollup(cursor):
+    """Recompute the whole rollup from mis_data"""
+    cursor.execute("DELETE FROM mis_daily_rollup")
+    apply_mis_rollup(cursor, "1 = 1")
+
+
+def mis_high_water(cursor):
+    """Highest mis_data id; rows inserted afterwards in the same transaction have larger ids"""
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS id FROM mis_data")
+    return cursor.fetchone()['id']
@@ -1,22 +1,36 @@
 from flask import Blueprint, request, jsonify, g
-from werkzeug.security import generate_password_hash
-from backend.auth import check_password
+from backend.auth import hash_password, verify_login
+from backend.passwords import HashingBusy
 import pandas as pd
 import os
 from datetime import datetime, date
-import requests
 from config import Config
 from backend.db import (
     get_user_by_username, get_user_by_id, create_user, 
-    update_user_login, log_login, get_team_members, get_all_users, get_db_connection
+    get_team_members, get_all_users, get_db_connection, db_connection,
+    get_pool_stats, update_user, USER_UPDATE_COLUMNS
 )
 from backend.auth import require_auth, require_role, require_admin_or_team_leader
-from backend.mis import get_mis_data, get_mis_statistics
-from backend.progress import create_lead, get_user_leads, update_lead_progress
+from backend.geolocation import get_location_worker
+from backend.audit import get_audit_writer
+from backend.mis import get_mis_data, count_mis_data, aggregate_mis_data, get_mis_statistics
+from backend.progress import create_lead, get_user_leads, count_user_leads, aggregate_leads, update_lead_progress
+from backend.dashboard import PANELS, load_dashboard
+from backend.pagination import InvalidCursor, InvalidFields, get_page_args, get_fields_arg, page_response
 
 # Create Blueprint
 app = Blueprint('api', __name__, url_prefix='/api')
 
+@app.route('/health', methods=['GET'])
+def health():
+    """Liveness and readiness probe - no auth, one trivial query"""
+    try:
+        with db_connection() as conn:
+            conn.execute('SELECT 1').fetchone()
+    except Exception as e:
+        return jsonify({'service': Config.SERVICE_NAME, 'status': 'unavailable', 'error': str(e)}), 503
+    return jsonify({'service': Config.SERVICE_NAME, 'status': 'ok', 'pid': os.getpid()}), 200
+
 @app.route('/login', methods=['POST'])
 def login():
     """User login endpoint"""
@@ -29,25 +43,25 @@ def login():
             return jsonify({'error': 'Username and password are required'}), 400
         
         user = get_user_by_username(username)
-        if not user or not check_password(user['password_hash'], password):
+        try:
+            verified = user is not None and verify_login(user, password)
+        except HashingBusy as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+        if not verified:
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        # Get location data (optional - don't fail if this doesn't work)
-        location = "Unknown"
-        try:
-            response = requests.get(Config.LOCATION_API_URL, timeout=2)
-            if response.status_code == 200:
-                location_data = response.json()
-                location = f"{location_data.get('city', 'Unknown')}, {location_data.get('country', 'Unknown')}"
-        except Exception as e:
-            # Log the error but don't fail the login
-            print(f"Location API error (non-critical): {e}")
-            location = "Unknown"
+        # Location comes from the cache or is resolved in the background
+        ip_address = request.remote_addr
+        location_worker = get_location_worker()
+        location = location_worker.cached(ip_address)
         
-        # Update login info
+        # Update login info - written behind by the audit writer
         try:
-            update_user_login(user['id'], location)
-            log_login(user['id'], request.remote_addr, location, request.headers.get('User-Agent', ''))
+            get_audit_writer().record_login(
+                user['id'], ip_address, location, request.headers.get('User-Agent', '')
+            )
+            if location is None:
+                location_worker.submit(ip_address, user['id'])
         except Exception as e:
             # Log the error but don't fail the login
             print(f"Login tracking error (non-critical): {e}")
@@ -87,7 +101,7 @@ def register():
         if not username or not password or not email:
             return jsonify({'error': 'Username, password, and email are required'}), 400
         
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
         user_id = create_user(username, password_hash, email, role, team_leader_id)
         
         if user_id:
@@ -130,6 +144,26 @@ def get_users():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/users/<int:user_id>', methods=['PUT'])
+@require_auth
+@require_role('admin')
+def update_user_route(user_id):
+    """Update a user's email, role, team leader or active status (Admin only)"""
+    try:
+        data = request.get_json() or {}
+        changes = {column: data[column] for column in USER_UPDATE_COLUMNS if column in data}
+        if 'is_active' in changes:
+            changes['is_active'] = 1 if changes['is_active'] else 0
+        if 'role' in changes and changes['role'] not in ['admin', 'team_leader', 'user']:
+            return jsonify({'error': 'Invalid role'}), 400
+        
+        if update_user(user_id, **changes):
+            return jsonify({'message': 'User updated successfully'}), 200
+        return jsonify({'error': 'User not found or email already exists'}), 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/profile', methods=['GET'])
 @require_auth
 def get_profile():
@@ -180,44 +214,133 @@ def get_mis_files():
 @app.route('/mis-data', methods=['GET'])
 @require_auth
 def get_mis_data_route():
-    """Get actual MIS data records based on role hierarchy"""
+    """Get one page of MIS data records based on role hierarchy.
+
+    Query parameters: limit (default Config.ITEMS_PER_PAGE), cursor (the
+    next_cursor of the previous page) and fields, a comma-separated list of
+    mis_data columns to return.
+    """
     try:
         current_user = g.current_user
+        limit, after = get_page_args()
         
-        # Get MIS data based on role
-        mis_data = get_mis_data(current_user['id'], current_user['role'], current_user['team_leader_id'])
-        
-        # Convert SQLite Row objects to dictionaries for JSON serialization
-        mis_data_dict = []
-        for row in mis_data:
-            mis_data_dict.append(dict(row))
+        # Fetch one extra row to know whether another page follows
+        scope = (current_user['id'], current_user['role'], current_user['team_leader_id'])
+        mis_data = get_mis_data(*scope, limit=limit + 1, after=after, fields=get_fields_arg())
+        total = count_mis_data(*scope)
         
-        return jsonify({'data': mis_data_dict}), 200
+        return page_response('data', mis_data, limit, total, 'upload_date'), 200
         
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in get_mis_data_route: {e}")
         return jsonify({'error': str(e)}), 500
 
+def get_aggregate_args():
+    """Read group_by, filter and top for an aggregate endpoint.
+
+    Returns (group_by, filters, top); raises InvalidFields on a malformed filter.
+    """
+    group_by = [column.strip() for column in request.args.get('group_by', '').split(',') if column.strip()]
+    filters = {}
+    for item in request.args.getlist('filter'):
+        column, separator, value = item.partition(':')
+        if not separator:
+            raise InvalidFields(f"Invalid filter {item!r}, expected column:value")
+        filters[column.strip()] = value
+    top = request.args.get('top', type=int)
+    if top is not None:
+        top = max(1, min(top, Config.MAX_ITEMS_PER_PAGE))
+    return group_by, filters, top
+
+@app.route('/mis-data/aggregate', methods=['GET'])
+@require_auth
+def aggregate_mis_data_route():
+    """Count MIS records by column based on role hierarchy.
+
+    Query parameters: group_by (comma-separated mis_data columns), filter
+    (repeatable column:value equality filters) and top (largest N groups).
+    """
+    try:
+        current_user = g.current_user
+        group_by, filters, top = get_aggregate_args()
+        
+        counts = aggregate_mis_data(
+            current_user['id'],
+            current_user['role'],
+            current_user['team_leader_id'],
+            group_by,
+            filters,
+            top
+        )
+        
+        return jsonify({'data': counts, 'group_by': group_by}), 200
+        
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/leads', methods=['GET'])
 @require_auth
 def get_leads():
-    """Get leads based on role hierarchy"""
+    """Get one page of leads based on role hierarchy.
+
+    Query parameters: status, campaign, team_member, limit, cursor and fields (see /mis-data).
+    """
     try:
         current_user = g.current_user
         status_filter = request.args.get('status')
+        campaign_tag = request.args.get('campaign')
         team_member = request.args.get('team_member')  # For team leaders to filter by member
+        limit, after = get_page_args()
         
         # Get leads based on role
-        leads = get_user_leads(
+        scope = (
             current_user['id'], 
             current_user['role'], 
             current_user['team_leader_id'],
             status_filter,
             team_member
         )
+        leads = get_user_leads(*scope, limit=limit + 1, after=after, fields=get_fields_arg(),
+                               campaign_tag=campaign_tag)
+        total = count_user_leads(*scope, campaign_tag=campaign_tag)
+        
+        return page_response('leads', leads, limit, total, 'created_at'), 200
+        
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/leads/aggregate', methods=['GET'])
+@require_auth
+def aggregate_leads_route():
+    """Count leads by column based on role hierarchy.
+
+    Query parameters: group_by (comma-separated leads columns or
+    created_date), filter, top (see /mis-data/aggregate) and team_member.
+    """
+    try:
+        current_user = g.current_user
+        group_by, filters, top = get_aggregate_args()
+        
+        counts = aggregate_leads(
+            current_user['id'],
+            current_user['role'],
+            current_user['team_leader_id'],
+            group_by,
+            filters,
+            top,
+            request.args.get('team_member')
+        )
         
-        return jsonify({'leads': leads}), 200
+        return jsonify({'data': counts, 'group_by': group_by}), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -426,4 +549,44 @@ def get_team_detailed_stats():
         return jsonify({'success': True, 'data': detailed_stats}), 200
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500 
+
+@app.route('/dashboard', methods=['GET'])
+@require_auth
+def get_dashboard():
+    """Get several dashboard panels in one round trip.
+
+    Query parameters: panels (comma-separated panel names), days and
+    mis_counts (comma-separated column or column:top items for the
+    mis-counts panel).
+    """
+    try:
+        panels = [name.strip() for name in request.args.get('panels', '').split(',') if name.strip()]
+        if not panels:
+            return jsonify({'error': f"panels is required, one or more of: {', '.join(PANELS)}"}), 400
+        days = request.args.get('days', 30, type=int)
+        
+        mis_counts = {}
+        for item in request.args.get('mis_counts', '').split(','):
+            column, _, top = item.strip().partition(':')
+            if column:
+                mis_counts[column] = max(1, min(int(top), Config.MAX_ITEMS_PER_PAGE)) if top else None
+        
+        dashboard = load_dashboard(g.current_user, panels, days, {'mis_counts': mis_counts})
+        return jsonify(dashboard), 200
+        
+    except ValueError as e:
+        # Unknown panel or a non-numeric top
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/system/db-pool', methods=['GET'])
+@require_auth
+@require_role('admin')
+def get_db_pool_stats():
+    """Get database connection pool metrics (Admin only)"""
+    try:
+        return jsonify({'success': True, 'data': get_pool_stats()}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
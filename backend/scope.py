@@ -0,0 +1,102 @@
+"""Role scopes resolved once per request.
+
+A TeamScope holds the users whose leads and MIS rows a caller may see:
+everyone for an admin, the team plus the caller for a team leader and
+just the caller otherwise. The user ID set is bound to SQL as a JSON
+array read through json_each, so every role branch runs the same
+indexed IN (...) plan instead of correlated subqueries on users.
+
+Scopes are memoized on flask.g for the rest of the request and per
+process until the users table changes (see db.bump_table_versions).
+"""
+import json
+from flask import g, has_app_context
+from config import Config
+from backend.cache import TTLCache
+from backend.db import db_connection, get_table_versions
+
+_scopes = TTLCache(max_size=Config.SCOPE_CACHE_SIZE, ttl=Config.SCOPE_CACHE_TTL)
+
+
+class TeamScope:
+    """The users visible to one caller"""
+
+    def __init__(self, user_id, role, member_ids=()):
+        self.user_id = user_id
+        self.role = role
+        # Team members only, without the caller
+        self.member_ids = list(member_ids)
+
+    @property
+    def is_admin(self):
+        """Admins see every row"""
+        return self.role == 'admin'
+
+    @property
+    def user_ids(self):
+        """IDs of every visible user, the caller included"""
+        return self.member_ids + [self.user_id]
+
+    def lead_condition(self, alias='l'):
+        """WHERE condition and params limiting leads to the ones owned or created in the scope"""
+        return self.owner_condition(alias, 'owner_user_id', 'created_by_id')
+
+    def owner_condition(self, alias, *columns):
+        """WHERE condition and params matching rows owned through any of the user ID columns"""
+        if self.is_admin:
+            return "1=1", []
+        ids = json.dumps(self.user_ids)
+        condition = ' OR '.join(f"{alias}.{column} IN (SELECT value FROM json_each(?))" for column in columns)
+        return f"({condition})", [ids] * len(columns)
+
+    def mis_condition(self, alias='md'):
+        """WHERE condition and params limiting mis_data to the scope.
+
+        A team leader sees their team's DSA rows and their own uploads, a
+        user only the rows where they are the DSA.
+        """
+        if self.is_admin:
+            return "1=1", []
+        if self.role == 'team_leader':
+            return (
+                f"({alias}.dsa_user_id IN (SELECT value FROM json_each(?)) OR {alias}.uploaded_by = ?)",
+                [json.dumps(self.member_ids), self.user_id]
+            )
+        return f"{alias}.dsa_user_id = ?", [self.user_id]
+
+
+def _load_team_scope(user_id, team_leader_id):
+    """Read a team leader's team from users"""
+    with db_connection() as conn:
+        members = conn.execute("SELECT id FROM users WHERE team_leader_id = ?", (team_leader_id,)).fetchall()
+    return TeamScope(user_id, 'team_leader', [member['id'] for member in members])
+
+
+def resolve_scope(user_id, role, team_leader_id=None):
+    """Return the TeamScope for a caller, resolving it at most once per request.
+
+    team_leader_id is the team whose members a team leader sees, as passed
+    to the role-scoped queries.
+    """
+    key = (user_id, role, team_leader_id)
+    request_scopes = None
+    if has_app_context():
+        request_scopes = g.setdefault('team_scopes', {})
+        if key in request_scopes:
+            return request_scopes[key]
+
+    if role != 'team_leader':
+        # Admins and users need no lookup
+        scope = TeamScope(user_id, role)
+    else:
+        version = get_table_versions(('users',))
+        entry = _scopes.get(key)
+        if entry is not None and entry[0] == version:
+            scope = entry[1]
+        else:
+            scope = _load_team_scope(user_id, team_leader_id)
+            _scopes.set(key, (version, scope))
+
+    if request_scopes is not None:
+        request_scopes[key] = scope
+    return scope
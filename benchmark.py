@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the BTL tracking backend
+Every benchmark runs against a throw-away database in a temporary folder
+
+Usage: python benchmark.py <benchmark> [options]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add the current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+import backend.db as db
+from backend.pool import ConnectionPool
+from config import Config
+
+STATUSES = ['APPROVED', 'PENDING', 'REJECTED', 'IN PROGRESS']
+CARD_TYPES = ['VISA PLATINUM', 'MASTERCARD', 'PREMIER', 'LIVE+']
+DROP_PAGES = ['Personal Details', 'Income Details', 'KYC', 'Offer', 'Submitted']
+STAGES = ['Lead', 'DIP', 'VKYC', 'Completed']
+
+# Storage profiles compared by the WAL benchmark
+STORAGE_PROFILES = {
+    'sqlite-defaults': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 5000},
+    'configured': Config.SQLITE_PRAGMAS,
+}
+
+
+def make_mis_frame(rows, seed=42):
+    """Build a synthetic HSBC MIS DataFrame with realistic column headers"""
+    rng = random.Random(seed)
+    dsa_ids = [f"RPM{n:03d}" for n in range(1, 41)]
+    campaigns = [f"PPIPL_{dsa}" for dsa in dsa_ids] + ['PPIPL_CHKR_WEB', 'PPIPL_PAID_SEARCH', 'DIRECT']
+    return pd.DataFrame({
+        'Data Type': ['Fresh'] * rows,
+        'APPLICATION NUMBER': [f"APP{n:08d}" for n in range(rows)],
+        'LEAD ID': [f"LD{n:08d}" for n in range(rows)],
+        'CREATION DATE/TIME': ['2024-01-15 10:30:00'] * rows,
+        'LAST UPDATED DATE/TIME': ['2024-01-16 12:00:00'] * rows,
+        'FORM CAMPAIGN_ID': [rng.choice(campaigns) for _ in range(rows)],
+        'APPLICATION STATUS': [rng.choice(STATUSES) for _ in range(rows)],
+        'CUSTOMER DROPPED PAGE': [rng.choice(DROP_PAGES) for _ in range(rows)],
+        'LEAD GENERATION STAGE': [rng.choice(STAGES) for _ in range(rows)],
+        'CARD TYPE': [rng.choice(CARD_TYPES) for _ in range(rows)],
+        'Status': [rng.choice(['Connected', 'Not Reachable', '']) for _ in range(rows)],
+        'Attempt': [rng.randint(1, 5) for _ in range(rows)],
+        'Remarks': ['Customer asked for a call back after salary credit'] * rows,
+        'VCIP-Auto-login-URL': [f"https://vcip.example.com/session/{n:012d}" for n in range(rows)],
+    })
+
+
+def use_database(path, pragmas):
+    """Point the backend at a fresh pool for the given database file"""
+    if db._pool is not None:
+        db._pool.close_all()
+    db._pool = ConnectionPool(path, max_size=Config.DB_POOL_SIZE,
+                              timeout=Config.DB_POOL_TIMEOUT, pragmas=pragmas)
+    db.init_db()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def bench_wal(args):
+    """Reader latency on the dashboard analytics query while an MIS file loads"""
+    from backend.mis import process_mis_data
+    from backend.progress import get_mis_analytics
+
+    # Bypass the result cache so every read runs the query against the database
+    # being loaded instead of returning a cached result
+    read_analytics = get_mis_analytics.__wrapped__
+
+    df = make_mis_frame(args.rows)
+    print(f"MIS ingest of {args.rows:,} rows with concurrent dashboard readers")
+
+    for name, pragmas in STORAGE_PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            use_database(os.path.join(tmp, 'bench.db'), pragmas)
+            process_mis_data(make_mis_frame(args.rows // 4, seed=7), 1, 'admin', 'seed.xlsx')
+
+            latencies = []
+            errors = []
+            done = threading.Event()
+
+            def reader():
+                while not done.is_set():
+                    started = time.perf_counter()
+                    try:
+                        with db.db_connection() as conn:
+                            conn.execute("SELECT COUNT(*) FROM mis_data").fetchone()
+                        read_analytics(1, 'admin', days=args.days)
+                    except Exception as e:
+                        errors.append(str(e))
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+            for thread in readers:
+                thread.start()
+
+            started = time.perf_counter()
+            process_mis_data(df, 1, 'admin', 'bench.xlsx')
+            load_time = time.perf_counter() - started
+            done.set()
+            for thread in readers:
+                thread.join()
+            db._pool.close_all()
+
+        print(f"\n[{name}] {pragmas}")
+        print(f"   - load time:      {load_time:.2f}s")
+        print(f"   - reader queries: {len(latencies)}  errors: {len(errors)}")
+        if latencies:
+            print(f"   - reader latency: p50={statistics.median(latencies):.1f}ms "
+                  f"p95={percentile(latencies, 95):.1f}ms max={max(latencies):.1f}ms")
+
+
+def bench_ingest(args):
+    """Throughput of process_mis_data on a synthetic MIS file"""
+    from backend.mis import process_mis_data
+
+    df = make_mis_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(os.path.join(tmp, 'bench.db'), Config.SQLITE_PRAGMAS)
+        started = time.perf_counter()
+        success, result = process_mis_data(df, 1, 'admin', 'bench.xlsx')
+        elapsed = time.perf_counter() - started
+        db._pool.close_all()
+
+    print(f"MIS ingest of {args.rows:,} rows: {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+    print(f"   - result: {result if success else 'FAILED: ' + str(result)}")
+
+
+def write_mis_workbook(path, rows):
+    """Write a synthetic MIS workbook with a 'Main' sheet"""
+    from openpyxl import Workbook
+
+    df = make_mis_frame(rows)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Main')
+    sheet.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+def bench_excel(args):
+    """Peak Python memory reading an MIS workbook whole vs streamed in batches"""
+    import tracemalloc
+    from backend.mis import read_mis_excel_batches
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'mis.xlsx')
+        write_mis_workbook(path, args.rows)
+        print(f"Reading a {args.rows:,}-row MIS workbook ({os.path.getsize(path) / (1024*1024):.1f} MB)")
+
+        readers = {
+            'pd.read_excel': lambda: len(pd.read_excel(path, sheet_name='Main', engine='openpyxl')),
+            'streamed batches': lambda: sum(len(batch) for batch in read_mis_excel_batches(path)),
+        }
+        for name, read in readers.items():
+            tracemalloc.start()
+            started = time.perf_counter()
+            rows = read()
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"   - {name:<17} rows={rows:,} time={elapsed:.1f}s peak={peak / (1024*1024):.1f} MB")
+
+
+# Tables small enough that a full scan is expected (iterating users or a team for per-user stats,
+# the bound id/username sets read through json_each, or the owned_leads rows found by index)
+SCAN_ALLOWED = {'users', 'u', 't', 'json_each', 'owned_leads'}
+
+
+def seed_roles():
+    """Create a team leader and a DSA under them; returns [(user_id, role, team_leader_id)]"""
+    from backend.db import create_user, get_user_by_username
+
+    create_user('bench_tl', 'x', 'bench_tl@example.com', 'team_leader')
+    team_leader = get_user_by_username('bench_tl')['id']
+    create_user('RPM001', 'x', 'rpm001@example.com', 'user', team_leader)
+    dsa = get_user_by_username('RPM001')['id']
+    return [(1, 'admin', None), (team_leader, 'team_leader', team_leader), (dsa, 'user', team_leader)]
+
+
+def traced_statements(calls):
+    """Run calls on one pooled connection and return every query they executed"""
+    statements = []
+    with db.db_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            for call in calls:
+                call()
+        finally:
+            conn.set_trace_callback(None)
+    seen = []
+    for sql in statements:
+        sql = ' '.join(sql.split())
+        if sql.upper().startswith(('SELECT', 'WITH')) and sql not in seen:
+            seen.append(sql)
+    return seen
+
+
+def bench_plans(args):
+    """EXPLAIN QUERY PLAN every hot read query; exits non-zero on a table scan"""
+    from backend import progress, mis
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(os.path.join(tmp, 'bench.db'), Config.SQLITE_PRAGMAS)
+        calls = []
+        for user_id, role, team_leader_id in seed_roles():
+            calls += [
+                lambda u=user_id, r=role, t=team_leader_id: progress.get_progress_statistics(u, r, t),
+                lambda u=user_id, r=role, t=team_leader_id: progress.get_user_performance(u, r, t),
+                lambda u=user_id, r=role, t=team_leader_id: progress.get_mis_analytics(u, r, t),
+                lambda u=user_id, r=role, t=team_leader_id: progress.get_user_login_stats(u, r, t),
+                lambda u=user_id, r=role, t=team_leader_id: progress.get_lead_analytics_by_status(u, r, t),
+                lambda u=user_id, r=role, t=team_leader_id: progress.get_user_leads(u, r, t, 'new'),
+                lambda u=user_id, r=role, t=team_leader_id: progress.get_campaign_progress('BTL', u, r, t),
+                lambda u=user_id, r=role, t=team_leader_id: mis.get_mis_data(u, r, t),
+                lambda u=user_id: progress.get_team_member_detailed_stats(u),
+            ]
+        statements = traced_statements(calls)
+
+        failures = []
+        with db.db_connection() as conn:
+            for sql in statements:
+                plan = [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                scans = [
+                    detail for detail in plan
+                    if detail.startswith('SCAN ') and 'USING' not in detail
+                    and detail.split()[1] not in SCAN_ALLOWED
+                ]
+                if scans:
+                    failures.append((sql, plan))
+                elif args.verbose:
+                    print(f"ok   {sql[:110]}")
+        db._pool.close_all()
+
+    for sql, plan in failures:
+        print(f"SCAN {sql}")
+        for detail in plan:
+            print(f"       {detail}")
+    print(f"\n{len(statements) - len(failures)}/{len(statements)} hot queries use indexes")
+    if failures:
+        sys.exit(1)
+
+
+def seed_team(members, leads, mis_rows, logins, seed=42):
+    """Create a team leader with members owning leads, MIS rows and logins; returns the team leader's id"""
+    from backend.db import create_user
+    from backend.rollups import rebuild_mis_rollup
+
+    rng = random.Random(seed)
+    team_leader = create_user('bench_tl', 'x', 'bench_tl@example.com', 'team_leader')
+    members = [
+        {'id': create_user(username, 'x', f"{username.lower()}@example.com", 'user', team_leader),
+         'username': username}
+        for username in (f"RPM{n:03d}" for n in range(1, members + 1))
+    ]
+    with db.db_connection() as conn:
+        for member in members:
+            conn.executemany(
+                "INSERT INTO leads (customer_name, status, assigned_to, created_by, created_by_id, owner_user_id, "
+                "campaign_tag, created_at) VALUES ('Customer', ?, ?, ?, ?, ?, 'BTL', datetime('now', ?))",
+                [(rng.choice(['new', 'in-progress', 'closed']), member['id'], member['username'],
+                  member['id'], member['id'], f"-{rng.randint(0, 20)} days") for _ in range(leads)]
+            )
+            conn.executemany(
+                "INSERT INTO mis_data (record_key, dsa_user_id, uploaded_by, application_status, upload_date) "
+                "VALUES (?, ?, 1, ?, datetime('now', ?))",
+                [(f"{member['id']}-{n}", member['id'], rng.choice(STATUSES), f"-{rng.randint(0, 20)} days")
+                 for n in range(mis_rows)]
+            )
+            conn.executemany(
+                "INSERT INTO login_logs (user_id, ip_address, location, user_agent, login_time) "
+                "VALUES (?, '10.0.0.1', 'Local network', 'bench', datetime('now', ?))",
+                [(member['id'], f"-{rng.randint(0, 20)} days") for _ in range(logins)]
+            )
+        rebuild_mis_rollup(conn.cursor())
+        conn.commit()
+    return team_leader
+
+
+def bench_team_stats(args):
+    """get_team_member_detailed_stats time as each member's leads, MIS rows and logins grow"""
+    from backend.progress import get_team_member_detailed_stats
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    print(f"Team detailed stats for {args.users} members; per member at scale 1: "
+          f"200 leads, 500 MIS rows, 30 logins")
+    baseline = None
+    for scale in scales:
+        leads, mis_rows, logins = 200 * scale, 500 * scale, 30 * scale
+        rows = args.users * (leads + mis_rows + logins)
+        with tempfile.TemporaryDirectory() as tmp:
+            use_database(os.path.join(tmp, 'bench.db'), Config.SQLITE_PRAGMAS)
+            team_leader = seed_team(args.users, leads, mis_rows, logins)
+            get_team_member_detailed_stats(team_leader, args.days)  # warm the page cache
+            timings = []
+            for _ in range(5):
+                started = time.perf_counter()
+                stats = get_team_member_detailed_stats(team_leader, args.days)
+                timings.append((time.perf_counter() - started) * 1000)
+            db._pool.close_all()
+
+        elapsed = statistics.median(timings)
+        per_row = elapsed * 1000 / rows
+        baseline = baseline or per_row
+        # A joint leads x MIS x logins join would visit this many rows per member
+        product = leads * mis_rows * logins
+        print(f"\n[scale {scale}] {rows:,} source rows, {len(stats)} members")
+        print(f"   - median: {elapsed:.1f}ms  ({per_row:.2f}us/row, {per_row / baseline:.2f}x scale 1)")
+        print(f"   - joint join would materialize {product:,} rows per member")
+
+
+def run_clients(clients, requests_total, request_fn):
+    """Run request_fn(client_index, n) for n in range(requests_total) across clients threads.
+
+    Returns (elapsed_seconds, latencies_ms, errors).
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(index):
+        for n in range(index, requests_total, clients):
+            started = time.perf_counter()
+            try:
+                request_fn(index, n)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, errors
+
+
+def bench_login(args):
+    """Login throughput through /api/login: legacy hash upgrade, bcrypt, verified-hash fast path"""
+    from werkzeug.security import generate_password_hash
+    from backend import create_app, geolocation, passwords
+    from backend.audit import close_audit_writer
+    from backend.db import create_user, get_user_by_username
+
+    Config.LOCATION_RESOLVER = 'offline'
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(os.path.join(tmp, 'bench.db'), Config.SQLITE_PRAGMAS)
+        app = create_app()
+        usernames = [f"login{n:03d}" for n in range(args.users)]
+        for username in usernames:
+            # Seeded in the legacy werkzeug format; the first login upgrades it
+            create_user(username, generate_password_hash('secret'), f"{username}@example.com")
+
+        clients = [app.test_client() for _ in range(args.clients)]
+
+        def login(index, n):
+            response = clients[index].post('/api/login', json={
+                'username': usernames[n % len(usernames)], 'password': 'secret'
+            })
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+
+        scenarios = [
+            ('first login (werkzeug -> bcrypt rehash)', 0, len(usernames)),
+            (f'bcrypt rounds={Config.BCRYPT_ROUNDS}', 0, args.logins),
+            ('verified-hash fast path', 300, args.logins),
+        ]
+        print(f"/api/login with {args.clients} concurrent clients, "
+              f"{Config.PASSWORD_HASH_WORKERS} hashing workers")
+        for name, verify_ttl, total in scenarios:
+            passwords._verified = passwords.VerifiedHashCache(verify_ttl)
+            if verify_ttl:
+                run_clients(args.clients, len(usernames), login)  # warm the fast path
+            elapsed, latencies, errors = run_clients(args.clients, total, login)
+            print(f"\n[{name}]")
+            print(f"   - {total / elapsed:,.1f} logins/s  errors: {len(errors)}")
+            if latencies:
+                print(f"   - latency: p50={statistics.median(latencies):.1f}ms "
+                      f"p95={percentile(latencies, 95):.1f}ms max={max(latencies):.1f}ms")
+
+        upgraded = sum(
+            get_user_by_username(username)['password_hash'].startswith(passwords.BCRYPT_PREFIXES)
+            for username in usernames
+        )
+        print(f"\n{upgraded}/{len(usernames)} legacy hashes upgraded to bcrypt")
+        # Write queued locations and login events before the database is removed
+        if geolocation._worker is not None:
+            geolocation._worker.join()
+        close_audit_writer()
+        db._pool.close_all()
+
+
+def wait_for_server(server, url, timeout=30.0):
+    """Poll url until the server answers; raise if it exits or never does"""
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server not ready after {timeout}s")
+
+
+def bench_serve(args):
+    """Throughput of a read endpoint served by gunicorn, per worker count"""
+    import subprocess
+    import requests
+    from backend.mis import process_mis_data
+
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        use_database(path, Config.SQLITE_PRAGMAS)
+        process_mis_data(make_mis_frame(args.rows), 1, 'admin', 'bench.xlsx')
+        db.close_pool()
+
+        base = f"http://127.0.0.1:{args.port}/api"
+        print(f"GET {args.endpoint} with {args.clients} concurrent clients, "
+              f"{args.threads} threads per worker, {os.cpu_count()} cores")
+        baseline = None
+        for workers in worker_counts:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", SERVER_HOST='127.0.0.1',
+                       SERVER_PORT=str(args.port), SERVER_WORKERS=str(workers),
+                       SERVER_THREADS=str(args.threads), LOCATION_RESOLVER='offline',
+                       FLASK_DEBUG='False')
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                cwd=Path(__file__).parent, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_for_server(server, f"{base}/login")
+                response = requests.post(f"{base}/login", json={'username': 'admin', 'password': 'admin123'})
+                headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+                sessions = [requests.Session() for _ in range(args.clients)]
+
+                def fetch(index, n):
+                    response = sessions[index].get(f"{base}{args.endpoint}", headers=headers, timeout=30)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"HTTP {response.status_code}")
+
+                run_clients(args.clients, args.clients * 2, fetch)  # warm every worker
+                elapsed, latencies, errors = run_clients(args.clients, args.requests, fetch)
+            finally:
+                server.terminate()
+                server.wait()
+
+            throughput = args.requests / elapsed
+            baseline = baseline or throughput
+            print(f"\n[{workers} worker(s)]")
+            print(f"   - {throughput:,.1f} req/s ({throughput / baseline:.2f}x)  errors: {len(errors)}")
+            if latencies:
+                print(f"   - latency: p50={statistics.median(latencies):.1f}ms "
+                      f"p95={percentile(latencies, 95):.1f}ms max={max(latencies):.1f}ms")
+
+
+BENCHMARKS = {
+    'login': (bench_login, "Login throughput per password verification path"),
+    'serve': (bench_serve, "Request throughput under gunicorn as worker processes are added"),
+    'team-stats': (bench_team_stats, "Team detailed stats time per source row as the data grows"),
+    'plans': (bench_plans, "Fail if a hot query's plan falls back to a table scan"),
+    'excel': (bench_excel, "Peak memory of whole-file vs streaming MIS workbook reads"),
+    'ingest': (bench_ingest, "MIS ingestion throughput"),
+    'wal': (bench_wal, "Reader latency during MIS ingestion per storage profile"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BTL tracking performance benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS),
+                        help='; '.join(f"{name}: {doc}" for name, (_, doc) in sorted(BENCHMARKS.items())))
+    parser.add_argument('--rows', type=int, default=50000, help="MIS rows to generate")
+    parser.add_argument('--readers', type=int, default=4, help="concurrent reader threads")
+    parser.add_argument('--days', type=int, default=30, help="analytics window in days")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent HTTP clients")
+    parser.add_argument('--logins', type=int, default=200, help="logins per login scenario")
+    parser.add_argument('--users', type=int, default=20, help="users to seed for the login and team-stats benchmarks")
+    parser.add_argument('--scales', default='1,2,4,8', help="comma-separated data multipliers for team-stats")
+    parser.add_argument('--workers', default='1,2,4', help="comma-separated gunicorn worker counts")
+    parser.add_argument('--threads', type=int, default=1, help="threads per gunicorn worker")
+    parser.add_argument('--requests', type=int, default=1000, help="requests per serve scenario")
+    parser.add_argument('--endpoint', default='/mis-data?limit=200', help="endpoint the serve benchmark reads")
+    parser.add_argument('--port', type=int, default=5055, help="port for the benchmark server")
+    parser.add_argument('--verbose', action='store_true', help="show passing queries too")
+    args = parser.parse_args()
+
+    func, _ = BENCHMARKS[args.benchmark]
+    func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,40 @@ from datetime import timedelta
 class Config:
     # Database Configuration - Using SQLite for easier setup
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///btl_tracking.db')
+    DATABASE_PATH = DATABASE_URL.replace('sqlite:///', '', 1)
+    
+    # Connection pool
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    
+    # SQLite storage profile - applied to every connection. WAL lets dashboard
+    # readers keep working while an MIS load is writing.
+    SQLITE_PRAGMAS = {
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),  # negative = KiB
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+    }
+    
+    # Authenticated user lookups cached by require_auth. A deactivation or role
+    # change made in another process is seen within USER_CACHE_TTL seconds.
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '60'))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))
+    # Team scopes resolved for role-scoped queries, also dropped as soon as
+    # the users table changes (see backend/scope.py)
+    SCOPE_CACHE_SIZE = int(os.getenv('SCOPE_CACHE_SIZE', '1024'))
+    SCOPE_CACHE_TTL = float(os.getenv('SCOPE_CACHE_TTL', '300'))
+    
+    # Password hashing - bcrypt cost for new hashes; older hashes are upgraded
+    # at login. Verification runs on a bounded pool of hashing threads.
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '32'))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+    # Seconds a verified password is remembered so repeat logins skip bcrypt (0 = off)
+    PASSWORD_VERIFY_CACHE_TTL = float(os.getenv('PASSWORD_VERIFY_CACHE_TTL', '300'))
     
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
@@ -18,11 +52,50 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
     DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
     
+    # Name reported by /api/health; the Streamlit frontend only reuses a
+    # backend that answers with it
+    SERVICE_NAME = 'btl-tracking-backend'
+    
+    # Production serving (gunicorn.conf.py) - worker processes and threads per worker
+    SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '5000'))
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str(os.cpu_count() or 2)))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '4'))
+    SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', '120'))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '30'))
+    # Recycle a worker after this many requests (0 = never)
+    SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', '0'))
+    
     # CORS Configuration
     CORS_ORIGINS = ['http://localhost:8501', 'http://127.0.0.1:8501']
     
-    # Location API Configuration
+    # Login audit events are written behind in batches of up to
+    # AUDIT_BATCH_SIZE, at least every AUDIT_FLUSH_INTERVAL seconds
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+    AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+    # A batch hitting a locked database is retried up to AUDIT_RETRY_LIMIT
+    # times, backing off from AUDIT_RETRY_DELAY doubling to AUDIT_RETRY_MAX_DELAY seconds
+    AUDIT_RETRY_LIMIT = int(os.getenv('AUDIT_RETRY_LIMIT', '10'))
+    AUDIT_RETRY_DELAY = float(os.getenv('AUDIT_RETRY_DELAY', '0.1'))
+    AUDIT_RETRY_MAX_DELAY = float(os.getenv('AUDIT_RETRY_MAX_DELAY', '5.0'))
+    
+    # Analytics result cache - entries are also dropped as soon as a table
+    # they read changes (see backend/result_cache.py)
+    ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', '512'))
+    ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', '900'))
+    
+    # MIS ingestion - rows per executemany chunk
+    MIS_BATCH_SIZE = int(os.getenv('MIS_BATCH_SIZE', '5000'))
+    
+    # Location API Configuration - logins are geolocated by a background worker
     LOCATION_API_URL = "http://ip-api.com/json/"
+    LOCATION_API_TIMEOUT = float(os.getenv('LOCATION_API_TIMEOUT', '2'))
+    LOCATION_RESOLVER = os.getenv('LOCATION_RESOLVER', 'ip-api')  # 'ip-api' or 'offline'
+    LOCATION_CACHE_SIZE = int(os.getenv('LOCATION_CACHE_SIZE', '4096'))
+    LOCATION_CACHE_TTL = float(os.getenv('LOCATION_CACHE_TTL', '86400'))
+    LOCATION_QUEUE_SIZE = int(os.getenv('LOCATION_QUEUE_SIZE', '1000'))
     
     # Pagination
-    ITEMS_PER_PAGE = 20 
\ No newline at end of file
+    ITEMS_PER_PAGE = 20
+    MAX_ITEMS_PER_PAGE = int(os.getenv('MAX_ITEMS_PER_PAGE', '500')) 
\ No newline at end of file
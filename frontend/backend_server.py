@@ -0,0 +1,127 @@
+"""Shared backend process for the Streamlit frontend.
+
+All Streamlit sessions in a process share one BackendSupervisor. Before
+starting anything it probes the backend's /health endpoint, so a backend
+already serving on this host - started by another Streamlit process, by
+run_backend.py or by gunicorn - is reused instead of spawning a duplicate
+that fights for the port. When it does start the backend it polls /health
+until the server is ready and stops it again when Streamlit exits.
+"""
+import atexit
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+import requests
+import streamlit as st
+from config import Config
+from frontend.helpers import API_BASE_URL
+
+HEALTH_URL = f"{API_BASE_URL}/health"
+BACKEND_COMMAND = [sys.executable, 'run_backend.py']
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+READY_TIMEOUT = 20.0      # seconds to wait for a started backend
+POLL_INTERVAL = 0.1       # seconds between readiness probes
+HEALTH_CHECK_INTERVAL = 5.0  # seconds a successful probe is trusted
+STOP_TIMEOUT = 10.0       # seconds to wait for a clean shutdown
+
+
+def backend_healthy(timeout=1.0):
+    """Check if this project's backend answers its health endpoint"""
+    try:
+        response = requests.get(HEALTH_URL, timeout=timeout)
+        return response.status_code == 200 and response.json().get('service') == Config.SERVICE_NAME
+    except (requests.RequestException, ValueError):
+        return False
+
+
+class BackendSupervisor:
+    """Starts the backend at most once per host and tracks its health"""
+
+    def __init__(self, command=None, cwd=None):
+        self.command = command or BACKEND_COMMAND
+        self.cwd = cwd or PROJECT_DIR
+        self.process = None
+        self._lock = threading.Lock()
+        self._healthy_at = 0.0
+
+    @property
+    def owned(self):
+        """True while this supervisor's own backend process is running"""
+        return self.process is not None and self.process.poll() is None
+
+    def ensure_running(self):
+        """Make sure a backend is serving; returns False if none became ready"""
+        if time.monotonic() - self._healthy_at < HEALTH_CHECK_INTERVAL:
+            return True
+        if self._probe():
+            return True
+        with self._lock:
+            if self._probe():
+                return True
+            if not self.owned:
+                self._start()
+            return self._wait_ready()
+
+    def _probe(self):
+        """Probe /health, remembering a success for HEALTH_CHECK_INTERVAL"""
+        if backend_healthy():
+            self._healthy_at = time.monotonic()
+            return True
+        return False
+
+    def _start(self):
+        """Spawn the backend in its own process group"""
+        print(f"Starting backend: {' '.join(self.command)}")
+        self.process = subprocess.Popen(
+            self.command, cwd=self.cwd,
+            start_new_session=(os.name == 'posix')
+        )
+
+    def _wait_ready(self):
+        """Poll /health until the backend answers or gives up"""
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._probe():
+                return True
+            if self.process is not None and self.process.poll() is not None:
+                # Lost a race for the port to another supervisor's backend
+                print(f"Backend exited with code {self.process.returncode}")
+                self.process = None
+                return self._probe()
+            time.sleep(POLL_INTERVAL)
+        return False
+
+    def stop(self):
+        """Stop the backend if this supervisor started it"""
+        with self._lock:
+            if not self.owned:
+                return
+            process = self.process
+            self.process = None
+            self._healthy_at = 0.0
+            # The dev server's reloader runs the app in a child process
+            if os.name == 'posix':
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+            try:
+                process.wait(timeout=STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                if os.name == 'posix':
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+                process.wait()
+
+
+@st.cache_resource
+def get_backend_supervisor():
+    """Return the supervisor shared by every session in this Streamlit process"""
+    supervisor = BackendSupervisor()
+    atexit.register(supervisor.stop)
+    return supervisor
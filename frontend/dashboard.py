@@ -1,15 +1,36 @@
+from functools import partial
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from frontend.helpers import (
-    get_dashboard_stats, get_mis_data, get_leads_data, 
-    get_performance_data, format_datetime, display_error_message,
-    get_user_role, get_team_members, get_current_user,
-    get_mis_analytics, get_login_stats, get_lead_analytics,
-    get_team_detailed_stats
+    get_dashboard_stats, get_mis_data, get_mis_page, get_leads_data, get_leads_page,
+    get_page_cursor, show_pager, get_performance_data, format_datetime, display_error_message,
+    get_user_role, get_current_user, get_dashboard_panels, load_concurrently
 )
 
+# Rows per page of the MIS table and number of recent leads shown
+MIS_PAGE_SIZE = 50
+RECENT_LEADS = 10
+
+# MIS chart dimensions -> number of largest groups fetched (None for all).
+# Counting runs in SQLite; only the count tables are downloaded.
+MIS_CHART_DIMENSIONS = {
+    'application_status': None,
+    'customer_dropped_page': 10,
+    'card_type': 1,
+    'lead_generation_stage': 1,
+}
+
+# Columns each dashboard panel renders - only these are fetched
+MIS_TABLE_FIELDS = [
+    'lead_id', 'application_number', 'form_campaign_id', 'username', 'application_status',
+    'card_type', 'customer_dropped_page', 'lead_generation_stage', 'status', 'disposition',
+    'booking_status', 'upload_date'
+]
+LEAD_CHART_FIELDS = ['campaign_tag', 'status']
+RECENT_LEAD_FIELDS = ['status', 'campaign_tag', 'created_at']
+
 def show_dashboard():
     """Display main dashboard with role-based access control"""
     st.title("📊 BTL Tracking Dashboard")
@@ -19,31 +40,48 @@ def show_dashboard():
     user_role = get_user_role()
     current_user = get_current_user()
     
-    # Load data based on role hierarchy
-    with st.spinner("Loading dashboard data..."):
-        stats = get_dashboard_stats()
-        mis_data = get_mis_data()
-        leads_data = get_leads_data()
-        
-        # Only load analytics data for team leaders and admins
-        performance_data = None
-        mis_analytics = None
-        login_stats = None
-        lead_analytics = None
-        team_detailed_stats = None
+    # Load data based on role hierarchy - the analytics panels come from one
+    # /dashboard request, run concurrently with the paged table fetches
+    panels = ['stats', 'mis-counts']
+    if user_role in ['admin', 'team_leader']:
+        panels += ['mis-analytics', 'login-stats', 'lead-analytics', 'team-members']
         
+        # Load team detailed stats for Team Leaders
+        if user_role == 'team_leader':
+            panels.append('team-detailed')
+    
+    with st.spinner("Loading dashboard data..."):
+        calls = {
+            'panels': partial(get_dashboard_panels, panels, mis_counts=MIS_CHART_DIMENSIONS),
+            'mis_page': partial(
+                get_mis_page, MIS_PAGE_SIZE, get_page_cursor('dashboard_mis'), fields=MIS_TABLE_FIELDS
+            ),
+            'recent_leads': partial(get_leads_page, RECENT_LEADS, fields=RECENT_LEAD_FIELDS),
+        }
         if user_role in ['admin', 'team_leader']:
-            performance_data = get_performance_data()
-            mis_analytics = get_mis_analytics()
-            login_stats = get_login_stats()
-            lead_analytics = get_lead_analytics()
-            
-            # Load team detailed stats for Team Leaders
-            if user_role == 'team_leader':
-                team_detailed_stats = get_team_detailed_stats()
+            calls['leads_data'] = partial(get_leads_data, fields=LEAD_CHART_FIELDS)
         
-        if user_role in ['admin', 'team_leader']:
-            team_members = get_team_members()
+        data = load_concurrently(calls)
+    
+    panel_data = data['panels']
+    
+    def panel(name, default):
+        """A requested panel's data, default if it failed; None if not requested"""
+        return panel_data.get(name, default) if name in panels else None
+    
+    stats = panel('stats', {})
+    counts = panel('mis-counts', {})
+    mis_counts = {column: counts.get(column, []) for column in MIS_CHART_DIMENSIONS}
+    mis_page, mis_next_cursor, mis_total = data['mis_page']
+    recent_leads, _, _ = data['recent_leads']
+    leads_data = data.get('leads_data')
+    mis_analytics = panel('mis-analytics', {})
+    login_stats = panel('login-stats', [])
+    lead_analytics = panel('lead-analytics', [])
+    team_detailed_stats = panel('team-detailed', [])
+    team_members = panel('team-members', [])
+    # The performance charts plot the team member list
+    performance_data = team_members
     
     # Team Member Filter (for Team Leaders)
     selected_team_member = None
@@ -59,9 +97,21 @@ def show_dashboard():
         # Filter data based on selected team member
         if selected_team_member != 'All Team Members':
             # Update data to show only selected team member's data
-            stats = get_dashboard_stats(team_member=selected_team_member)
-            leads_data = get_leads_data(team_member=selected_team_member)
-            performance_data = get_performance_data(team_member=selected_team_member)
+            member_data = load_concurrently({
+                'stats': partial(get_dashboard_stats, team_member=selected_team_member),
+                'leads_data': partial(
+                    get_leads_data, team_member=selected_team_member, fields=LEAD_CHART_FIELDS
+                ),
+                'recent_leads': partial(
+                    get_leads_page, RECENT_LEADS, team_member=selected_team_member,
+                    fields=RECENT_LEAD_FIELDS
+                ),
+                'performance_data': partial(get_performance_data, team_member=selected_team_member),
+            })
+            stats = member_data['stats']
+            leads_data = member_data['leads_data']
+            recent_leads, _, _ = member_data['recent_leads']
+            performance_data = member_data['performance_data']
     
     # Key Metrics Row
     st.subheader("📈 Key Performance Metrics")
@@ -103,114 +153,79 @@ def show_dashboard():
         )
     
     # MIS Data Section - Show full MIS data for users
-    if mis_data:
+    if mis_total:
         st.markdown("---")
         st.subheader("📋 My MIS Data")
+        st.markdown(f"**Total MIS Records: {mis_total:,}**")
         
-        # Convert to DataFrame for better display
-        mis_df = pd.DataFrame(mis_data)
+        # Show MIS Statistics for users
+        st.markdown("### 📊 MIS Statistics")
         
-        if not mis_df.empty:
-            st.markdown(f"**Total MIS Records: {len(mis_df)}**")
-            
-            # Show MIS Statistics for users
-            st.markdown("### 📊 MIS Statistics")
-            
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                # Application Status breakdown
-                if 'application_status' in mis_df.columns:
-                    status_counts = mis_df['application_status'].value_counts()
-                    total_status = len(mis_df)
-                    st.metric("Total Applications", total_status)
-                else:
-                    st.metric("Total Applications", len(mis_df))
-            
-            with col2:
-                # Customer Dropped Page analysis
-                if 'customer_dropped_page' in mis_df.columns:
-                    drop_page_counts = mis_df['customer_dropped_page'].value_counts()
-                    if not drop_page_counts.empty:
-                        most_dropped = drop_page_counts.index[0]
-                        st.metric("Most Dropped Page", most_dropped)
-                    else:
-                        st.metric("Most Dropped Page", "N/A")
-                else:
-                    st.metric("Most Dropped Page", "N/A")
-            
-            with col3:
-                # Card Type analysis
-                if 'card_type' in mis_df.columns:
-                    card_counts = mis_df['card_type'].value_counts()
-                    if not card_counts.empty:
-                        most_card = card_counts.index[0]
-                        st.metric("Most Card Type", most_card)
-                    else:
-                        st.metric("Most Card Type", "N/A")
-                else:
-                    st.metric("Most Card Type", "N/A")
-            
-            with col4:
-                # Lead Generation Stage
-                if 'lead_generation_stage' in mis_df.columns:
-                    stage_counts = mis_df['lead_generation_stage'].value_counts()
-                    if not stage_counts.empty:
-                        most_stage = stage_counts.index[0]
-                        st.metric("Most Stage", most_stage)
-                    else:
-                        st.metric("Most Stage", "N/A")
-                else:
-                    st.metric("Most Stage", "N/A")
-            
-            # Detailed Statistics
-            st.markdown("### 📈 Detailed Statistics")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Application Status Chart
-                if 'application_status' in mis_df.columns:
-                    status_counts = mis_df['application_status'].value_counts()
-                    if not status_counts.empty:
-                        fig_status = px.pie(
-                            values=status_counts.values,
-                            names=status_counts.index,
-                            title="Application Status Distribution"
-                        )
-                        st.plotly_chart(fig_status, use_container_width=True)
-            
-            with col2:
-                # Customer Dropped Page Chart
-                if 'customer_dropped_page' in mis_df.columns:
-                    drop_counts = mis_df['customer_dropped_page'].value_counts().head(10)
-                    if not drop_counts.empty:
-                        fig_drop = px.bar(
-                            x=drop_counts.index,
-                            y=drop_counts.values,
-                            title="Top 10 Customer Drop Pages",
-                            labels={'x': 'Drop Page', 'y': 'Count'}
-                        )
-                        st.plotly_chart(fig_drop, use_container_width=True)
-            
-            # Show all MIS data in a table
-            st.markdown("### 📋 Complete MIS Data")
-            st.dataframe(
-                mis_df,
-                use_container_width=True,
-                height=400
-            )
-            
-            # Add download button for the data
-            csv = mis_df.to_csv(index=False)
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            # Application Status breakdown
+            st.metric("Total Applications", mis_total)
+        
+        with col2:
+            # Customer Dropped Page analysis
+            st.metric("Most Dropped Page", top_value(mis_counts['customer_dropped_page'], 'customer_dropped_page'))
+        
+        with col3:
+            # Card Type analysis
+            st.metric("Most Card Type", top_value(mis_counts['card_type'], 'card_type'))
+        
+        with col4:
+            # Lead Generation Stage
+            st.metric("Most Stage", top_value(mis_counts['lead_generation_stage'], 'lead_generation_stage'))
+        
+        # Detailed Statistics
+        st.markdown("### 📈 Detailed Statistics")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Application Status Chart
+            status_counts = pd.DataFrame(mis_counts['application_status'])
+            if not status_counts.empty:
+                fig_status = px.pie(
+                    values=status_counts['count'],
+                    names=status_counts['application_status'],
+                    title="Application Status Distribution"
+                )
+                st.plotly_chart(fig_status, use_container_width=True)
+        
+        with col2:
+            # Customer Dropped Page Chart
+            drop_counts = pd.DataFrame(mis_counts['customer_dropped_page'])
+            if not drop_counts.empty:
+                fig_drop = px.bar(
+                    x=drop_counts['customer_dropped_page'],
+                    y=drop_counts['count'],
+                    title="Top 10 Customer Drop Pages",
+                    labels={'x': 'Drop Page', 'y': 'Count'}
+                )
+                st.plotly_chart(fig_drop, use_container_width=True)
+        
+        # Show MIS data one page at a time
+        st.markdown("### 📋 Complete MIS Data")
+        st.dataframe(
+            pd.DataFrame(mis_page),
+            use_container_width=True,
+            height=400
+        )
+        show_pager('dashboard_mis', mis_next_cursor, mis_total, MIS_PAGE_SIZE)
+        
+        # The full export is only fetched when asked for
+        if st.checkbox("Prepare MIS data for download", key='dashboard_mis_export'):
+            with st.spinner("Preparing MIS data..."):
+                csv = pd.DataFrame(get_mis_data(fields=MIS_TABLE_FIELDS)).to_csv(index=False)
             st.download_button(
                 label="📥 Download MIS Data as CSV",
                 data=csv,
                 file_name=f"mis_data_{current_user.get('username', 'user')}.csv",
                 mime="text/csv"
             )
-        else:
-            st.info("No MIS data available.")
     else:
         st.info("No MIS data available.")
     
@@ -251,30 +266,30 @@ def show_dashboard():
     st.subheader("🕒 Recent Activity")
     
     # Show recent leads
-    if leads_data:
-        recent_leads = leads_data[:10]  # Show last 10 leads
-        if recent_leads:
-            st.markdown("### Recent Leads")
-            leads_df = pd.DataFrame(recent_leads)
-            
-            # Format datetime columns
-            if 'created_at' in leads_df.columns:
-                leads_df['created_at'] = pd.to_datetime(leads_df['created_at'])
-                leads_df['created_at'] = leads_df['created_at'].dt.strftime('%Y-%m-%d %H:%M')
-            
-            # Select columns to display
-            display_columns = ['lead_id', 'status', 'campaign_tag', 'created_at']
-            available_columns = [col for col in display_columns if col in leads_df.columns]
-            
-            st.dataframe(
-                leads_df[available_columns],
-                use_container_width=True
-            )
-        else:
-            st.info("No recent leads found.")
+    if recent_leads:
+        st.markdown("### Recent Leads")
+        leads_df = pd.DataFrame(recent_leads)
+        
+        # Format datetime columns
+        if 'created_at' in leads_df.columns:
+            leads_df['created_at'] = pd.to_datetime(leads_df['created_at'])
+            leads_df['created_at'] = leads_df['created_at'].dt.strftime('%Y-%m-%d %H:%M')
+        
+        # Select columns to display
+        display_columns = ['lead_id', 'status', 'campaign_tag', 'created_at']
+        available_columns = [col for col in display_columns if col in leads_df.columns]
+        
+        st.dataframe(
+            leads_df[available_columns],
+            use_container_width=True
+        )
     else:
         st.info("No leads data available.")
 
+def top_value(counts, column):
+    """Largest group's value from a mis-counts panel entry, or N/A"""
+    return counts[0][column] if counts else "N/A"
+
 def show_lead_performance_charts(performance_data, leads_data):
     """Show lead performance charts."""
     if performance_data:
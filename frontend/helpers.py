@@ -1,5 +1,14 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import json
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
@@ -9,6 +18,157 @@ import pandas as pd
 # API Configuration
 API_BASE_URL = "http://localhost:5000/api"
 
+# HTTP client - one keep-alive connection pool shared by every Streamlit session
+API_CONNECT_TIMEOUT = 3.05   # seconds
+API_READ_TIMEOUT = 30        # seconds
+API_UPLOAD_TIMEOUT = 300     # seconds, MIS file uploads
+API_POOL_SIZE = 20           # keep-alive connections to the backend
+API_GET_RETRIES = 3          # idempotent GETs only
+API_RETRY_BACKOFF = 0.3      # seconds, doubled per retry
+
+_http = None
+_http_lock = threading.Lock()
+
+def get_http_session():
+    """Return the process-wide requests session used for backend calls.
+
+    GETs are retried with exponential backoff on connection errors and
+    502/503/504. A read timeout is not retried: the backend already spent
+    the whole timeout on the request, and repeating it would only multiply
+    the wait and the load. Other methods are only retried when the connection could
+    not be made, so nothing is sent twice. Cookies are never stored because
+    the session is shared by every logged-in user.
+    """
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                retry = Retry(
+                    total=API_GET_RETRIES,
+                    read=0,
+                    backoff_factor=API_RETRY_BACKOFF,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(['GET']),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                _http = session
+    return _http
+
+ID_SEGMENT = re.compile(r'/\d+')
+
+class EndpointLatency:
+    """Per-endpoint latency of backend calls made by this Streamlit process"""
+    
+    def __init__(self, window=200):
+        self.window = window
+        self._endpoints = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def route(method, endpoint):
+        """Group calls by route, e.g. PUT /users/{id}"""
+        return f"{method.upper()} {ID_SEGMENT.sub('/{id}', endpoint)}"
+    
+    def record(self, method, endpoint, elapsed_ms, ok):
+        """Record one call"""
+        with self._lock:
+            stats = self._endpoints.setdefault(self.route(method, endpoint), {
+                'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'recent': deque(maxlen=self.window)
+            })
+            stats['calls'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['recent'].append(elapsed_ms)
+    
+    def snapshot(self):
+        """Return one row per route, slowest in total first"""
+        rows = []
+        with self._lock:
+            for route, stats in self._endpoints.items():
+                recent = sorted(stats['recent'])
+                rows.append({
+                    'endpoint': route,
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 1),
+                    'p95_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 1),
+                    'max_ms': round(stats['max_ms'], 1),
+                    'last_ms': round(stats['recent'][-1], 1),
+                    'total_ms': round(stats['total_ms'], 1),
+                })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+    
+    def reset(self):
+        """Forget every recorded call"""
+        with self._lock:
+            self._endpoints.clear()
+
+api_latency = EndpointLatency()
+
+# Concurrent data loading - independent API calls of one page run in parallel
+LOADER_WORKERS = 16
+
+_loader = None
+_loader_lock = threading.Lock()
+_loader_state = threading.local()
+
+def get_loader_pool():
+    """Return the process-wide thread pool that runs concurrent API calls"""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                _loader = ThreadPoolExecutor(max_workers=LOADER_WORKERS, thread_name_prefix='api-loader')
+    return _loader
+
+def _run_in_script(ctx, func):
+    """Run func on a loader thread as part of the calling script run.
+
+    Returns (result, unauthorized); a 401 is only recorded here and handled
+    by the script thread, which alone may clear the session and rerun.
+    """
+    add_script_run_ctx(threading.current_thread(), ctx)
+    _loader_state.active = True
+    _loader_state.unauthorized = False
+    try:
+        return func(), _loader_state.unauthorized
+    finally:
+        _loader_state.active = False
+
+def load_concurrently(calls):
+    """Run independent data calls concurrently and return {name: result}.
+
+    calls maps a name to a zero-argument callable, e.g. a helper wrapped in
+    functools.partial. The calls read the session's token and user exactly
+    as they would on the script thread, so page latency is roughly that of
+    the slowest call rather than the sum of all of them.
+    """
+    ctx = get_script_run_ctx()
+    pool = get_loader_pool()
+    futures = {name: pool.submit(_run_in_script, ctx, func) for name, func in calls.items()}
+    
+    results = {}
+    unauthorized = False
+    for name, future in futures.items():
+        results[name], expired = future.result()
+        unauthorized = unauthorized or expired
+    if unauthorized:
+        handle_session_expired()
+    return results
+
+def handle_session_expired():
+    """Clear the session and send the user back to the login page"""
+    st.session_state.clear()
+    st.error("Session expired. Please login again.")
+    st.rerun()
+
 def get_auth_headers():
     """Get authentication headers with JWT token"""
     token = st.session_state.get('access_token')
@@ -18,31 +178,37 @@ def get_auth_headers():
 
 def api_request(method, endpoint, data=None, files=None, params=None):
     """Make API request with error handling"""
+    started = time.perf_counter()
+    ok = False
     try:
         url = f"{API_BASE_URL}{endpoint}"
         headers = get_auth_headers()
+        session = get_http_session()
+        timeout = (API_CONNECT_TIMEOUT, API_UPLOAD_TIMEOUT if files else API_READ_TIMEOUT)
         
         if method.upper() == 'GET':
-            response = requests.get(url, headers=headers, params=params)
+            response = session.get(url, headers=headers, params=params, timeout=timeout)
         elif method.upper() == 'POST':
             if files:
                 # Remove Content-Type for file uploads
                 headers.pop('Content-Type', None)
-                response = requests.post(url, headers=headers, files=files)
+                response = session.post(url, headers=headers, files=files, timeout=timeout)
             else:
-                response = requests.post(url, headers=headers, json=data)
+                response = session.post(url, headers=headers, json=data, timeout=timeout)
         elif method.upper() == 'PUT':
-            response = requests.put(url, headers=headers, json=data)
+            response = session.put(url, headers=headers, json=data, timeout=timeout)
         elif method.upper() == 'DELETE':
-            response = requests.delete(url, headers=headers)
+            response = session.delete(url, headers=headers, timeout=timeout)
         else:
             return False, "Invalid HTTP method"
         
+        ok = response.status_code < 500
         if response.status_code == 401:
             # Token expired or invalid
-            st.session_state.clear()
-            st.error("Session expired. Please login again.")
-            st.rerun()
+            if getattr(_loader_state, 'active', False):
+                _loader_state.unauthorized = True
+                return False, "Session expired. Please login again."
+            handle_session_expired()
         
         if response.status_code >= 200 and response.status_code < 300:
             return True, response.json()
@@ -50,10 +216,26 @@ def api_request(method, endpoint, data=None, files=None, params=None):
             error_data = response.json() if response.content else {}
             return False, error_data.get('error', f'HTTP {response.status_code}')
             
+    except requests.exceptions.Timeout:
+        return False, "The server took too long to respond. Please try again."
     except requests.exceptions.ConnectionError:
         return False, "Cannot connect to server. Please check if the backend is running."
     except Exception as e:
         return False, f"Request failed: {str(e)}"
+    finally:
+        api_latency.record(method, endpoint, (time.perf_counter() - started) * 1000, ok)
+
+def show_api_latency_panel():
+    """Debug panel with per-endpoint backend latency for this Streamlit process"""
+    with st.expander("🔧 API latency", expanded=True):
+        rows = api_latency.snapshot()
+        if not rows:
+            st.caption("No API calls recorded yet")
+            return
+        st.dataframe(pd.DataFrame(rows).drop(columns=['total_ms']), use_container_width=True)
+        if st.button("Reset latency stats", key='reset_api_latency'):
+            api_latency.reset()
+            st.rerun()
 
 def login_user(username, password):
     """Login user and store token"""
@@ -96,6 +278,11 @@ def create_user(user_data):
     success, response = api_request('POST', '/register', user_data)
     return success, response
 
+def update_user(user_id, changes):
+    """Update a user's email, role, team leader or active status (Admin only)"""
+    success, response = api_request('PUT', f'/users/{user_id}', changes)
+    return success, response
+
 # Dashboard Helper Functions
 def get_dashboard_stats(team_member=None):
     """Get dashboard statistics with optional team member filtering"""
@@ -196,26 +383,125 @@ def display_info_message(message):
     st.info(message)
 
 # Data Retrieval Functions
-def get_mis_data():
-    """Get MIS data based on user role"""
-    success, response = api_request('GET', '/mis-data')
+# Largest page the backend serves (Config.MAX_ITEMS_PER_PAGE)
+MAX_PAGE_SIZE = 500
+
+def get_page(endpoint, key, params=None, limit=20, cursor=None, fields=None):
+    """Fetch one keyset page from a list endpoint.
+
+    fields lists the columns the caller renders; None fetches every column.
+    Returns (items, next_cursor, total); next_cursor is None on the last page.
+    """
+    params = dict(params or {})
+    params['limit'] = limit
+    if cursor:
+        params['cursor'] = cursor
+    if fields:
+        params['fields'] = ','.join(fields)
+    
+    success, response = api_request('GET', endpoint, params=params)
+    if success:
+        return response.get(key, []), response.get('next_cursor'), response.get('total', 0)
+    return [], None, 0
+
+def get_all_pages(endpoint, key, params=None, fields=None):
+    """Fetch every page of a list endpoint, for views that need the whole set"""
+    items, cursor, _ = get_page(endpoint, key, params, limit=MAX_PAGE_SIZE, fields=fields)
+    while cursor:
+        page, cursor, _ = get_page(endpoint, key, params, limit=MAX_PAGE_SIZE, cursor=cursor, fields=fields)
+        items.extend(page)
+    return items
+
+def get_mis_page(limit=20, cursor=None, fields=None):
+    """Get one page of MIS data based on user role; returns (rows, next_cursor, total)"""
+    return get_page('/mis-data', 'data', limit=limit, cursor=cursor, fields=fields)
+
+def get_mis_data(fields=None):
+    """Get all MIS data based on user role, optionally only the given columns"""
+    return get_all_pages('/mis-data', 'data', fields=fields)
+
+def get_mis_counts(group_by, filters=None, top=None):
+    """Get MIS record counts grouped by one or more columns, largest groups first.
+
+    filters maps columns to required values. Returns a list of dicts with
+    the group_by columns and 'count'.
+    """
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+    params = {'group_by': ','.join(group_by)}
+    if filters:
+        params['filter'] = [f"{column}:{value}" for column, value in filters.items()]
+    if top:
+        params['top'] = top
+    
+    success, response = api_request('GET', '/mis-data/aggregate', params=params)
     if success:
         return response.get('data', [])
     return []
 
-def get_leads_data(status_filter=None, team_member=None):
-    """Get leads data with optional filtering"""
+def _leads_params(status_filter=None, team_member=None, campaign_tag=None):
+    """Query parameters for the leads endpoint"""
     params = {}
     if status_filter:
         params['status'] = status_filter
+    if campaign_tag:
+        params['campaign'] = campaign_tag
     if team_member and team_member != 'All Team Members':
         params['team_member'] = team_member
+    return params
+
+def get_leads_page(limit=20, cursor=None, status_filter=None, team_member=None, fields=None, campaign_tag=None):
+    """Get one page of leads; returns (leads, next_cursor, total)"""
+    return get_page('/leads', 'leads', _leads_params(status_filter, team_member, campaign_tag),
+                    limit=limit, cursor=cursor, fields=fields)
+
+def get_lead_counts(group_by, filters=None, top=None):
+    """Get lead counts grouped by one or more columns, largest groups first.
+
+    Like get_mis_counts; 'created_date' groups by the day a lead was created.
+    """
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+    params = {'group_by': ','.join(group_by)}
+    if filters:
+        params['filter'] = [f"{column}:{value}" for column, value in filters.items()]
+    if top:
+        params['top'] = top
     
-    success, response = api_request('GET', '/leads', params=params)
+    success, response = api_request('GET', '/leads/aggregate', params=params)
     if success:
-        return response.get('leads', [])
+        return response.get('data', [])
     return []
 
+def get_leads_data(status_filter=None, team_member=None, fields=None):
+    """Get all leads data with optional filtering"""
+    return get_all_pages('/leads', 'leads', _leads_params(status_filter, team_member), fields=fields)
+
+def get_page_cursor(key):
+    """Cursor of the page currently shown in the paged table named key"""
+    return st.session_state.get(f'{key}_cursors', [None])[-1]
+
+def show_pager(key, next_cursor, total, page_size):
+    """Previous/next controls for a keyset-paged table.
+
+    Cursors of the pages already visited are kept in session state so
+    "Previous" can step back without offsets.
+    """
+    cursors = st.session_state.setdefault(f'{key}_cursors', [None])
+    page = len(cursors)
+    first = (page - 1) * page_size + 1 if total else 0
+    last = min(page * page_size, total)
+    
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        if st.button("◀ Previous", key=f'{key}_previous', disabled=page == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Showing {first:,}–{last:,} of {total:,} records")
+    with col3:
+        if st.button("Next ▶", key=f'{key}_next', disabled=not next_cursor):
+            cursors.append(next_cursor)
+            st.rerun()
+
 def get_performance_data(days=30, team_member=None):
     """Get performance data with optional team member filtering"""
     params = {'days': days}
@@ -400,6 +686,27 @@ def get_lead_analytics():
         return response.get('data', [])
     return []
 
+def get_dashboard_panels(panels, days=30, mis_counts=None):
+    """Get several dashboard panels from /dashboard in one request.
+
+    mis_counts maps MIS columns to the number of largest groups to count
+    (None for all). Returns {panel: data}; failed panels are left out.
+    Server-side panel timings are recorded in the API latency stats.
+    """
+    params = {'panels': ','.join(panels), 'days': days}
+    if mis_counts:
+        params['mis_counts'] = ','.join(
+            f"{column}:{top}" if top else column for column, top in mis_counts.items()
+        )
+    
+    success, response = api_request('GET', '/dashboard', params=params)
+    if not success:
+        return {}
+    errors = response.get('errors', {})
+    for name, elapsed_ms in response.get('timings_ms', {}).items():
+        api_latency.record('PANEL', name, elapsed_ms, name not in errors)
+    return response.get('panels', {})
+
 def get_team_detailed_stats():
     """Get detailed team member statistics (Team Leaders only)"""
     success, response = api_request('GET', '/team/detailed-stats')
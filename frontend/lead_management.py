@@ -1,7 +1,9 @@
+from functools import partial
 import streamlit as st
 import pandas as pd
 from frontend.helpers import (
-    get_leads_data, create_lead, update_lead_progress, get_lead_details,
+    get_leads_page, get_lead_counts, get_page_cursor, show_pager, load_concurrently,
+    create_lead, update_lead_progress, get_lead_details,
     get_lead_status_options, display_success_message, display_error_message,
     format_datetime, create_metrics_dataframe, get_user_role
 )
@@ -67,275 +69,250 @@ def show_create_lead_section():
                 else:
                     display_error_message(f"Failed to create lead: {result}")
 
+# Leads shown per page in the leads table
+LEADS_PAGE_SIZE = 25
+
 def show_view_leads_section():
-    """Show leads viewing section"""
+    """Show leads viewing section, one server-side page at a time"""
     st.subheader("📊 View Leads")
     
-    # Load leads data
+    # Filters are applied by the backend, so only the rendered page is fetched
+    st.markdown("### Filters")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        status_options = ['All'] + get_lead_status_options()
+        selected_status = st.selectbox("Lead Status", status_options)
+    
+    with col2:
+        campaign_counts = get_lead_counts('campaign_tag')
+        campaigns = ['All'] + sorted(row['campaign_tag'] for row in campaign_counts if row['campaign_tag'])
+        selected_campaign = st.selectbox("Campaign", campaigns)
+    
+    status_filter = None if selected_status == 'All' else selected_status
+    campaign_filter = None if selected_campaign == 'All' else selected_campaign
+    # Changing a filter starts a new pager at the first page
+    pager_key = f"leads_{selected_status}_{selected_campaign}"
+    
     with st.spinner("Loading leads data..."):
-        leads_data = get_leads_data()
+        data = load_concurrently({
+            'page': partial(
+                get_leads_page, LEADS_PAGE_SIZE, get_page_cursor(pager_key),
+                status_filter=status_filter, campaign_tag=campaign_filter
+            ),
+            'status_counts': partial(
+                get_lead_counts, 'status', {'campaign_tag': campaign_filter} if campaign_filter else None
+            ),
+        })
+    leads, next_cursor, total = data['page']
+    status_counts = {row['status']: row['count'] for row in data['status_counts']}
     
-    if leads_data:
-        # Convert to DataFrame
-        df = create_metrics_dataframe(leads_data)
-        
-        # Filters
-        st.markdown("### Filters")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            # Status filter
-            status_options = ['All'] + get_lead_status_options()
-            selected_status = st.selectbox("Lead Status", status_options)
-        
-        with col2:
-            # Campaign filter
-            campaigns = ['All'] + sorted(df['campaign_tag'].unique().tolist())
-            selected_campaign = st.selectbox("Campaign", campaigns)
-        
-        with col3:
-            # Date range filter
-            if 'assigned_date' in df.columns:
-                df['assigned_date'] = pd.to_datetime(df['assigned_date'])
-                min_date = df['assigned_date'].min()
-                max_date = df['assigned_date'].max()
-                
-                date_range = st.date_input(
-                    "Date Range",
-                    value=(min_date, max_date),
-                    min_value=min_date,
-                    max_value=max_date
-                )
-        
-        # Apply filters
-        filtered_df = df.copy()
-        
-        if selected_status != 'All':
-            filtered_df = filtered_df[filtered_df['lead_status'] == selected_status]
-        
-        if selected_campaign != 'All':
-            filtered_df = filtered_df[filtered_df['campaign_tag'] == selected_campaign]
-        
-        if 'assigned_date' in filtered_df.columns and len(date_range) == 2:
-            start_date, end_date = date_range
-            filtered_df = filtered_df[
-                (filtered_df['assigned_date'].dt.date >= start_date) &
-                (filtered_df['assigned_date'].dt.date <= end_date)
-            ]
-        
-        # Display filtered data
-        st.markdown(f"### Leads ({len(filtered_df)} records)")
-        
-        # Show key metrics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            total_leads = len(filtered_df)
-            st.metric("Total Leads", total_leads)
-        
-        with col2:
-            new_leads = len(filtered_df[filtered_df['lead_status'] == 'new'])
-            st.metric("New Leads", new_leads)
-        
-        with col3:
-            in_progress = len(filtered_df[filtered_df['lead_status'] == 'in-progress'])
-            st.metric("In Progress", in_progress)
-        
-        with col4:
-            closed_leads = len(filtered_df[filtered_df['lead_status'] == 'closed'])
-            st.metric("Closed Leads", closed_leads)
-        
-        # Data table with action buttons
-        st.markdown("### Lead Details")
-        
-        # Display leads in a more interactive way
-        for index, lead in filtered_df.iterrows():
-            with st.expander(f"Lead #{lead.get('lead_id', index)} - {lead.get('campaign_tag', 'N/A')} ({lead.get('lead_status', 'N/A')})"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.write(f"**Customer:** {lead.get('customer_name', 'N/A')}")
-                    st.write(f"**Phone:** {lead.get('customer_phone', 'N/A')}")
-                    st.write(f"**Email:** {lead.get('customer_email', 'N/A')}")
-                    st.write(f"**Bank:** {lead.get('bank_name', 'N/A')}")
-                    st.write(f"**Assigned Date:** {lead.get('assigned_date', 'N/A')}")
-                    st.write(f"**Notes:** {lead.get('progress_notes', 'N/A')}")
-                
-                with col2:
-                    # Update progress form
-                    with st.form(f"update_lead_{lead.get('lead_id', index)}"):
-                        new_status = st.selectbox(
-                            "Status",
-                            get_lead_status_options(),
-                            index=get_lead_status_options().index(lead.get('lead_status', 'new')),
-                            key=f"status_{lead.get('lead_id', index)}"
-                        )
+    if not total:
+        st.info("No leads available. Create some leads first!")
+        return
+    
+    # Show key metrics for the filtered set, counted by the backend
+    st.markdown(f"### Leads ({total:,} records)")
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Leads", total)
+    
+    with col2:
+        st.metric("New Leads", status_counts.get('new', 0))
+    
+    with col3:
+        st.metric("In Progress", status_counts.get('in-progress', 0))
+    
+    with col4:
+        st.metric("Closed Leads", status_counts.get('closed', 0))
+    
+    # Data table with action buttons
+    st.markdown("### Lead Details")
+    df = create_metrics_dataframe(leads)
+    status_options = get_lead_status_options()
+    
+    for lead in leads:
+        lead_id = lead.get('id')
+        with st.expander(f"Lead #{lead_id} - {lead.get('campaign_tag') or 'N/A'} ({lead.get('status', 'N/A')})"):
+            col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                st.write(f"**Customer:** {lead.get('customer_name') or 'N/A'}")
+                st.write(f"**Phone:** {lead.get('phone_number') or 'N/A'}")
+                st.write(f"**Email:** {lead.get('email') or 'N/A'}")
+                st.write(f"**Bank:** {lead.get('bank') or 'N/A'}")
+                st.write(f"**Created:** {format_datetime(lead.get('created_at'))}")
+                st.write(f"**Notes:** {lead.get('notes') or 'N/A'}")
+            
+            with col2:
+                # Update progress form
+                with st.form(f"update_lead_{lead_id}"):
+                    status = lead.get('status', 'new')
+                    new_status = st.selectbox(
+                        "Status",
+                        status_options,
+                        index=status_options.index(status) if status in status_options else 0,
+                        key=f"status_{lead_id}"
+                    )
+                    
+                    progress_notes = st.text_area(
+                        "Progress Notes",
+                        value=lead.get('notes') or '',
+                        key=f"notes_{lead_id}"
+                    )
+                    
+                    if st.form_submit_button("Update"):
+                        progress_data = {
+                            "progress_status": new_status,
+                            "progress_notes": progress_notes
+                        }
                         
-                        progress_notes = st.text_area(
-                            "Progress Notes",
-                            value=lead.get('progress_notes', ''),
-                            key=f"notes_{lead.get('lead_id', index)}"
-                        )
+                        success, message = update_lead_progress(lead_id, progress_data)
                         
-                        if st.form_submit_button("Update"):
-                            progress_data = {
-                                "progress_status": new_status,
-                                "progress_notes": progress_notes
-                            }
-                            
-                            success, message = update_lead_progress(
-                                lead.get('lead_id'), progress_data
-                            )
-                            
-                            if success:
-                                display_success_message("Lead updated successfully!")
-                                st.rerun()
-                            else:
-                                display_error_message(f"Failed to update lead: {message}")
-        
-        # Download option
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Leads Data (CSV)",
-            data=csv,
-            file_name=f"leads_{selected_campaign}_{selected_status}.csv",
-            mime="text/csv"
-        )
-        
-    else:
-        st.info("No leads available. Create some leads first!")
+                        if success:
+                            display_success_message("Lead updated successfully!")
+                            st.rerun()
+                        else:
+                            display_error_message(f"Failed to update lead: {message}")
+    
+    show_pager(pager_key, next_cursor, total, LEADS_PAGE_SIZE)
+    
+    # Download option
+    csv = df.to_csv(index=False)
+    st.download_button(
+        label="📥 Download This Page (CSV)",
+        data=csv,
+        file_name=f"leads_{selected_campaign}_{selected_status}.csv",
+        mime="text/csv"
+    )
 
 def show_lead_analytics_section():
-    """Show lead analytics section"""
+    """Show lead analytics section from backend lead counts"""
     st.subheader("📈 Lead Analytics")
     
-    # Load leads data for analytics
+    # Each chart is one grouped count; no lead rows are downloaded
     with st.spinner("Loading lead analytics..."):
-        leads_data = get_leads_data()
+        counts = load_concurrently({
+            'status': partial(get_lead_counts, 'status'),
+            'campaign': partial(get_lead_counts, 'campaign_tag', top=10),
+            'timeline': partial(get_lead_counts, ['created_date', 'status']),
+            'bank': partial(get_lead_counts, 'bank'),
+        })
     
-    if leads_data:
-        df = create_metrics_dataframe(leads_data)
-        
-        # Analytics overview
-        st.markdown("### Overview Analytics")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Lead status distribution
-            st.markdown("**Lead Status Distribution**")
-            status_counts = df['lead_status'].value_counts()
-            
-            import plotly.express as px
-            fig_status = px.pie(
-                values=status_counts.values,
-                names=status_counts.index,
-                title="Leads by Status",
-                color_discrete_map={
-                    'new': '#FF6B6B',
-                    'in-progress': '#4ECDC4',
-                    'closed': '#45B7D1',
-                    'rejected': '#96CEB4'
-                }
-            )
-            st.plotly_chart(fig_status, use_container_width=True)
-        
-        with col2:
-            # Campaign performance
-            st.markdown("**Campaign Performance**")
-            campaign_counts = df['campaign_tag'].value_counts().head(10)
-            
-            fig_campaign = px.bar(
-                x=campaign_counts.index,
-                y=campaign_counts.values,
-                title="Leads by Campaign",
-                labels={'x': 'Campaign', 'y': 'Count'}
-            )
-            fig_campaign.update_xaxes(tickangle=45)
-            st.plotly_chart(fig_campaign, use_container_width=True)
+    if not counts['status']:
+        st.info("No leads data available for analytics. Create some leads first!")
+        return
+    
+    import plotly.express as px
+    status_df = pd.DataFrame(counts['status']).rename(columns={'status': 'Status', 'count': 'Count'})
+    campaign_df = pd.DataFrame(counts['campaign']).rename(columns={'campaign_tag': 'Campaign', 'count': 'Count'})
+    
+    # Analytics overview
+    st.markdown("### Overview Analytics")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Lead status distribution
+        st.markdown("**Lead Status Distribution**")
+        fig_status = px.pie(
+            status_df,
+            values='Count',
+            names='Status',
+            title="Leads by Status",
+            color='Status',
+            color_discrete_map={
+                'new': '#FF6B6B',
+                'in-progress': '#4ECDC4',
+                'closed': '#45B7D1',
+                'rejected': '#96CEB4'
+            }
+        )
+        st.plotly_chart(fig_status, use_container_width=True)
+    
+    with col2:
+        # Campaign performance
+        st.markdown("**Campaign Performance**")
+        fig_campaign = px.bar(
+            campaign_df,
+            x='Campaign',
+            y='Count',
+            title="Leads by Campaign"
+        )
+        fig_campaign.update_xaxes(tickangle=45)
+        st.plotly_chart(fig_campaign, use_container_width=True)
+    
+    # Detailed analytics
+    st.markdown("### Detailed Analytics")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Lead Status Summary**")
+        st.dataframe(status_df, use_container_width=True)
+    
+    with col2:
+        st.markdown("**Top Campaigns**")
+        st.dataframe(campaign_df, use_container_width=True)
+    
+    # Timeline analysis
+    if counts['timeline']:
+        st.markdown("### Lead Timeline Analysis")
+        
+        timeline_data = pd.DataFrame(counts['timeline']).sort_values('created_date')
+        fig_timeline = px.line(
+            timeline_data,
+            x='created_date',
+            y='count',
+            color='status',
+            title="Lead Creation Timeline",
+            labels={'created_date': 'Date', 'count': 'Leads', 'status': 'Status'}
+        )
+        st.plotly_chart(fig_timeline, use_container_width=True)
+    
+    # Performance metrics
+    st.markdown("### Performance Metrics")
+    
+    status_totals = dict(zip(status_df['Status'], status_df['Count']))
+    total_leads = sum(status_totals.values())
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        closed_leads = status_totals.get('closed', 0)
+        success_rate = round((closed_leads / total_leads) * 100, 1) if total_leads > 0 else 0
+        st.metric("Success Rate", f"{success_rate}%")
+    
+    with col2:
+        avg_processing_time = "N/A"  # Would need more data to calculate
+        st.metric("Avg Processing Time", avg_processing_time)
+    
+    with col3:
+        active_leads = status_totals.get('new', 0) + status_totals.get('in-progress', 0)
+        st.metric("Active Leads", active_leads)
+    
+    # Bank-wise analysis
+    bank_counts = [row for row in counts['bank'] if row['bank']]
+    if bank_counts:
+        st.markdown("### Bank-wise Analysis")
         
-        # Detailed analytics
-        st.markdown("### Detailed Analytics")
+        bank_df = pd.DataFrame(bank_counts).rename(columns={'bank': 'Bank', 'count': 'Count'})
         
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("**Lead Status Summary**")
-            status_summary = df['lead_status'].value_counts()
-            st.dataframe(status_summary.reset_index().rename(
-                columns={'index': 'Status', 'lead_status': 'Count'}
-            ), use_container_width=True)
+            st.markdown("**Leads by Bank**")
+            st.dataframe(bank_df, use_container_width=True)
         
         with col2:
-            st.markdown("**Top Campaigns**")
-            campaign_summary = df['campaign_tag'].value_counts().head(10)
-            st.dataframe(campaign_summary.reset_index().rename(
-                columns={'index': 'Campaign', 'campaign_tag': 'Count'}
-            ), use_container_width=True)
-        
-        # Timeline analysis
-        if 'assigned_date' in df.columns:
-            st.markdown("### Lead Timeline Analysis")
-            
-            # Group by date and count leads
-            df['assigned_date'] = pd.to_datetime(df['assigned_date'])
-            df['date'] = df['assigned_date'].dt.date
-            
-            timeline_data = df.groupby(['date', 'lead_status']).size().reset_index(name='count')
-            
-            fig_timeline = px.line(
-                timeline_data,
-                x='date',
-                y='count',
-                color='lead_status',
-                title="Lead Creation Timeline",
-                labels={'date': 'Date', 'count': 'Leads', 'lead_status': 'Status'}
+            fig_bank = px.pie(
+                bank_df,
+                values='Count',
+                names='Bank',
+                title="Leads by Bank"
             )
-            st.plotly_chart(fig_timeline, use_container_width=True)
-        
-        # Performance metrics
-        st.markdown("### Performance Metrics")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            total_leads = len(df)
-            closed_leads = len(df[df['lead_status'] == 'closed'])
-            success_rate = round((closed_leads / total_leads) * 100, 1) if total_leads > 0 else 0
-            st.metric("Success Rate", f"{success_rate}%")
-        
-        with col2:
-            avg_processing_time = "N/A"  # Would need more data to calculate
-            st.metric("Avg Processing Time", avg_processing_time)
-        
-        with col3:
-            active_leads = len(df[df['lead_status'].isin(['new', 'in-progress'])])
-            st.metric("Active Leads", active_leads)
-        
-        # Bank-wise analysis
-        if 'bank_name' in df.columns:
-            st.markdown("### Bank-wise Analysis")
-            
-            bank_stats = df['bank_name'].value_counts()
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("**Leads by Bank**")
-                st.dataframe(bank_stats.reset_index().rename(
-                    columns={'index': 'Bank', 'bank_name': 'Count'}
-                ), use_container_width=True)
-            
-            with col2:
-                fig_bank = px.pie(
-                    values=bank_stats.values,
-                    names=bank_stats.index,
-                    title="Leads by Bank"
-                )
-                st.plotly_chart(fig_bank, use_container_width=True)
-    
-    else:
-        st.info("No leads data available for analytics. Create some leads first!")
+            st.plotly_chart(fig_bank, use_container_width=True)
 
 def main():
     """Main lead management function"""
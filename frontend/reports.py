@@ -6,6 +6,9 @@ from frontend.helpers import (
     create_metrics_dataframe, get_user_role, check_permissions
 )
 
+# mis_data columns the MIS reports read - only these are fetched
+MIS_REPORT_FIELDS = ['username', 'team_leader_name', 'upload_date']
+
 def show_reports():
     """Display reports page"""
     st.title("📋 Reports & Analytics")
@@ -408,7 +411,7 @@ def show_mis_reports():
     
     # Load MIS data
     with st.spinner("Loading MIS data..."):
-        mis_data = get_mis_data()
+        mis_data = get_mis_data(fields=MIS_REPORT_FIELDS)
     
     if mis_data:
         mis_df = create_metrics_dataframe(mis_data)
@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 from frontend.helpers import (
     get_team_members, display_success_message, display_error_message,
-    format_datetime, create_metrics_dataframe, get_user_role, check_permissions
+    format_datetime, create_metrics_dataframe, get_user_role, check_permissions,
+    update_user
 )
 
 def show_team_management():
@@ -120,9 +121,16 @@ def show_team_members_section():
                         st.info("Edit functionality coming soon...")
                 
                 with col2:
-                    if st.button("Deactivate" if member_data.get('is_active', True) else "Activate", 
-                                key=f"toggle_{member_data['username']}"):
-                        st.info("Toggle status functionality coming soon...")
+                    is_active = bool(member_data.get('is_active', True))
+                    if st.button("Deactivate" if is_active else "Activate", 
+                                key=f"toggle_{member_data['username']}",
+                                disabled=not check_permissions('admin')):
+                        success, response = update_user(member_data['id'], {'is_active': not is_active})
+                        if success:
+                            display_success_message(response.get('message', 'User updated'))
+                            st.rerun()
+                        else:
+                            display_error_message(f"Failed to update user: {response}")
                 
                 with col3:
                     if st.button("View Performance", key=f"perf_{member_data['username']}"):
@@ -13,81 +13,50 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from backend.db import get_db_connection, init_db
-from backend.mis import validate_mis_data, process_mis_data, extract_username_from_campaign_id, is_dsa_campaign
+from backend.mis import (
+    read_mis_excel_batches, process_mis_batches, extract_username_from_campaign_id, is_dsa_campaign
+)
 
-def load_mis_data_from_file():
-    """Load MIS data from the data folder"""
-    try:
-        # Initialize database
-        init_db()
-        print("✅ Database initialized successfully!")
-        
-        # Path to the MIS file
-        mis_file_path = "data/PPIPL HSBC MIS.xlsx"
-        
-        if not os.path.exists(mis_file_path):
-            print(f"❌ Error: MIS file not found at {mis_file_path}")
-            return False
-        
-        print(f"📁 Loading MIS data from: {mis_file_path}")
-        
-        # Read the Excel file from the 'Main' sheet
-        try:
-            df = pd.read_excel(mis_file_path, sheet_name='Main', engine='openpyxl')
-            print(f"✅ Successfully read Excel file (Main sheet) with {len(df)} rows and {len(df.columns)} columns")
-        except Exception as e:
-            print(f"❌ Error reading Excel file: {e}")
-            return False
-        
-        # Validate the data structure
-        is_valid, message = validate_mis_data(df)
-        if not is_valid:
-            print(f"❌ Data validation failed: {message}")
-            return False
-        
-        print(f"✅ Data validation successful: {message}")
-        
-        # Process and store the data
-        # Use admin user (ID=1) as the uploader
-        success, result = process_mis_data(df, uploaded_by=1, created_by="admin", file_name="PPIPL_HSBC_MIS.xlsx")
-        
-        if success:
-            print(f"✅ Successfully loaded MIS data: {result}")
-            return True
-        else:
-            print(f"❌ Failed to load MIS data: {result}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return False
+MIS_FILE_PATH = "data/PPIPL HSBC MIS.xlsx"
 
-def analyze_mis_data():
-    """Analyze the MIS data to show what's in it"""
-    try:
-        mis_file_path = "data/PPIPL HSBC MIS.xlsx"
-        
-        if not os.path.exists(mis_file_path):
-            print(f"❌ Error: MIS file not found at {mis_file_path}")
-            return
-        
-        print(f"📊 Analyzing MIS data from: {mis_file_path}")
-        
-        # Read the Excel file from the 'Main' sheet
-        df = pd.read_excel(mis_file_path, sheet_name='Main', engine='openpyxl')
+class MisFileAnalysis:
+    """Collects MIS file statistics batch by batch while the file streams past"""
+    
+    def __init__(self, sample_size=3):
+        self.sample_size = sample_size
+        self.total_rows = 0
+        self.columns = []
+        self.campaign_ids = {}
+        self.sample = None
+    
+    def update(self, df):
+        """Fold one batch of rows into the analysis"""
+        if not self.columns:
+            self.columns = list(df.columns)
+        if self.sample is None or len(self.sample) < self.sample_size:
+            head = df.head(self.sample_size)
+            self.sample = head if self.sample is None else pd.concat([self.sample, head]).head(self.sample_size)
+        self.total_rows += len(df)
         
+        if 'FORM CAMPAIGN_ID' in df.columns:
+            # dict keeps first-seen order, like Series.unique()
+            for campaign_id in df['FORM CAMPAIGN_ID'].dropna():
+                self.campaign_ids.setdefault(campaign_id, None)
+    
+    def report(self, mis_file_path=MIS_FILE_PATH):
+        """Print the analysis"""
         print(f"\n📋 File Overview:")
-        print(f"   - Total rows: {len(df):,}")
-        print(f"   - Total columns: {len(df.columns)}")
+        print(f"   - Total rows: {self.total_rows:,}")
+        print(f"   - Total columns: {len(self.columns)}")
         print(f"   - File size: {os.path.getsize(mis_file_path) / (1024*1024):.2f} MB")
         
         print(f"\n📝 Column Names:")
-        for i, col in enumerate(df.columns, 1):
+        for i, col in enumerate(self.columns, 1):
             print(f"   {i:2d}. {col}")
         
         # Analyze FORM CAMPAIGN_ID column
-        if 'FORM CAMPAIGN_ID' in df.columns:
-            campaign_ids = df['FORM CAMPAIGN_ID'].dropna().unique()
+        if 'FORM CAMPAIGN_ID' in self.columns:
+            campaign_ids = list(self.campaign_ids)
             print(f"\n🎯 FORM CAMPAIGN_ID Analysis:")
             print(f"   - Unique campaign IDs: {len(campaign_ids)}")
             
@@ -118,8 +87,64 @@ def analyze_mis_data():
                     print(f"     • {username}")
         
         # Show sample data
-        print(f"\n📄 Sample Data (first 3 rows):")
-        print(df.head(3).to_string())
+        if self.sample is not None:
+            print(f"\n📄 Sample Data (first {self.sample_size} rows):")
+            print(self.sample.to_string())
+
+def load_mis_data_from_file(analysis=None):
+    """Load MIS data from the data folder, streaming the workbook in batches.
+
+    Pass a MisFileAnalysis to analyse the file during the same pass.
+    """
+    try:
+        # Initialize database
+        init_db()
+        print("✅ Database initialized successfully!")
+        
+        # Path to the MIS file
+        mis_file_path = MIS_FILE_PATH
+        
+        if not os.path.exists(mis_file_path):
+            print(f"❌ Error: MIS file not found at {mis_file_path}")
+            return False
+        
+        print(f"📁 Loading MIS data from: {mis_file_path} (Main sheet)")
+        
+        # Stream the 'Main' sheet straight into the database
+        # Use admin user (ID=1) as the uploader
+        batches = read_mis_excel_batches(mis_file_path, sheet_name='Main')
+        success, result = process_mis_batches(
+            batches, uploaded_by=1, created_by="admin", file_name="PPIPL_HSBC_MIS.xlsx",
+            on_batch=analysis.update if analysis else None
+        )
+        
+        if success:
+            print(f"✅ Successfully loaded MIS data: {result}")
+            return True
+        else:
+            print(f"❌ Failed to load MIS data: {result}")
+            return False
+            
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+
+def analyze_mis_data():
+    """Analyze the MIS data to show what's in it"""
+    try:
+        mis_file_path = MIS_FILE_PATH
+        
+        if not os.path.exists(mis_file_path):
+            print(f"❌ Error: MIS file not found at {mis_file_path}")
+            return
+        
+        print(f"📊 Analyzing MIS data from: {mis_file_path}")
+        
+        # Stream the 'Main' sheet so large workbooks never sit in memory
+        analysis = MisFileAnalysis()
+        for batch in read_mis_excel_batches(mis_file_path, sheet_name='Main'):
+            analysis.update(batch)
+        analysis.report(mis_file_path)
         
     except Exception as e:
         print(f"❌ Error analyzing MIS data: {e}")
@@ -129,7 +154,7 @@ if __name__ == "__main__":
     print("=" * 50)
     
     # Check if data file exists
-    if not os.path.exists("data/PPIPL HSBC MIS.xlsx"):
+    if not os.path.exists(MIS_FILE_PATH):
         print("❌ Error: MIS file not found in data folder")
         print("Please ensure 'PPIPL HSBC MIS.xlsx' is in the 'data' folder")
         sys.exit(1)
@@ -152,9 +177,12 @@ if __name__ == "__main__":
                 print("\n❌ Failed to load MIS data")
                 sys.exit(1)
         elif choice == "3":
-            analyze_mis_data()
+            # One pass over the workbook feeds both the loader and the analysis
+            analysis = MisFileAnalysis()
+            loaded = load_mis_data_from_file(analysis)
+            analysis.report()
             print("\n" + "="*50)
-            if load_mis_data_from_file():
+            if loaded:
                 print("\n🎉 MIS data loaded successfully!")
             else:
                 print("\n❌ Failed to load MIS data")
@@ -0,0 +1,12 @@
+"""WSGI entry point for production serving
+
+Run with: gunicorn -c gunicorn.conf.py wsgi:app
+Each worker runs the version-checked init_db when it imports the app: a
+single read when the schema is current, otherwise the pending migrations
+are applied (serialized across workers by the migration lock). This keeps
+a SIGHUP reload that ships new migrations, or a plain `gunicorn wsgi:app`
+against a fresh database, from serving without a current schema.
+"""
+from backend import create_app
+
+app = create_app()